@@ -216,6 +216,71 @@ async function extractFramesAtTimes(videoPath, timesSec) {
     return { tempDir, framePaths };
 }
 
+// Long-lived mediapipe_faces.py --daemon child: models load once and each
+// request is one JSON line in, one JSON line out. Replies come back in
+// request order, so pending callbacks are a simple FIFO.
+let mediapipeDaemon = null;
+
+function getMediapipeDaemon(pythonExecutable, scriptPath) {
+    if (mediapipeDaemon) return mediapipeDaemon;
+
+    const proc = spawn(pythonExecutable, ['-u', scriptPath, '--daemon']);
+    const daemon = { proc, pending: [], stdoutBuffer: '', stderr: '' };
+    mediapipeDaemon = daemon;
+
+    const failPending = (err) => {
+        if (mediapipeDaemon === daemon) mediapipeDaemon = null;
+        daemon.pending.splice(0).forEach(({ reject }) => reject(err));
+    };
+
+    proc.stdout.on('data', (data) => {
+        daemon.stdoutBuffer += data.toString();
+        let newline;
+        while ((newline = daemon.stdoutBuffer.indexOf('\n')) !== -1) {
+            const line = daemon.stdoutBuffer.slice(0, newline).trim();
+            daemon.stdoutBuffer = daemon.stdoutBuffer.slice(newline + 1);
+            if (!line) continue;
+            const request = daemon.pending.shift();
+            if (!request) continue;
+            try {
+                request.resolve(JSON.parse(line));
+            } catch (err) {
+                request.reject(new Error(`Failed to parse mediapipe output: ${err.message || err}`));
+            }
+        }
+    });
+
+    proc.stderr.on('data', (data) => {
+        const text = data.toString();
+        daemon.stderr = (daemon.stderr + text).slice(-4000);
+        text.split('\n').filter(Boolean).forEach(line => {
+            console.log(line);
+        });
+    });
+
+    proc.stdin.on('error', (err) => {
+        failPending(err);
+    });
+
+    proc.on('close', (code) => {
+        failPending(new Error(daemon.stderr || `mediapipe exited with code ${code}`));
+    });
+
+    proc.on('error', (err) => {
+        failPending(err);
+    });
+
+    return daemon;
+}
+
+function stopMediapipeDaemon() {
+    if (!mediapipeDaemon) return;
+    const { proc } = mediapipeDaemon;
+    mediapipeDaemon = null;
+    proc.stdin.end();
+    proc.kill();
+}
+
 async function analyzeFacesWithMediapipe(framePaths, options = {}) {
     const pythonExecutable = resolvePythonExecutable();
     const scriptPath = path.join(__dirname, 'src', 'utils', 'mediapipe_faces.py');
@@ -229,44 +294,10 @@ async function analyzeFacesWithMediapipe(framePaths, options = {}) {
         throw new Error(`MediaPipe script not found at ${scriptPath}`);
     }
 
+    const daemon = getMediapipeDaemon(pythonExecutable, scriptPath);
     return new Promise((resolve, reject) => {
-        const args = ['-u', scriptPath, '--frames', ...framePaths];
-        if (activeSpeaker) {
-            args.push('--active-speaker');
-        }
-        const proc = spawn(pythonExecutable, args);
-        let stdout = '';
-        let stderr = '';
-
-        proc.stdout.on('data', (data) => {
-            stdout += data.toString();
-        });
-
-        proc.stderr.on('data', (data) => {
-            const text = data.toString();
-            stderr += text;
-            text.split('\n').filter(Boolean).forEach(line => {
-                console.log(line);
-            });
-        });
-
-        proc.on('close', (code) => {
-            if (code !== 0) {
-                return reject(new Error(stderr || `mediapipe exited with code ${code}`));
-            }
-
-            try {
-                const output = stdout.trim();
-                const parsed = JSON.parse(output);
-                resolve(parsed);
-            } catch (err) {
-                reject(new Error(`Failed to parse mediapipe output: ${err.message || err}`));
-            }
-        });
-
-        proc.on('error', (err) => {
-            reject(err);
-        });
+        daemon.pending.push({ resolve, reject });
+        daemon.proc.stdin.write(JSON.stringify({ frames: framePaths, active_speaker: activeSpeaker }) + '\n');
     });
 }
 
@@ -800,6 +831,10 @@ app.on('window-all-closed', () => {
     if (process.platform !== 'darwin') app.quit();
 });
 
+app.on('will-quit', () => {
+    stopMediapipeDaemon();
+});
+
 app.on('activate', () => {
     if (BrowserWindow.getAllWindows().length === 0) createWindow();
 });
@@ -1,6 +1,17 @@
 """ASR (Automatic Speech Recognition) module"""
 
-from .transcriber import Transcriber
-from .diarization import Diarizer
+from typing import Any
 
 __all__ = ["Transcriber", "Diarizer"]
+
+
+def __getattr__(name: str) -> Any:
+    # Resolve on first access so importing src.asr doesn't load
+    # faster_whisper/whisperx until a transcriber or diarizer is needed
+    if name == "Transcriber":
+        from .transcriber import Transcriber
+        return Transcriber
+    if name == "Diarizer":
+        from .diarization import Diarizer
+        return Diarizer
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,14 +1,62 @@
 """Speaker diarization using WhisperX"""
 
+import hashlib
 import os
-from typing import Dict, Any, Optional
+import threading
+from typing import Dict, Any, List, Optional, Tuple
 
-try:
-    import whisperx
-    WHISPERX_AVAILABLE = True
-except ImportError:
-    WHISPERX_AVAILABLE = False
-    whisperx = None
+import numpy as np
+
+# whisperx pulls in torch and pyannote, so it is imported on first use
+_whisperx = None
+
+
+def _load_whisperx():
+    """Import whisperx on first use; None if it isn't installed."""
+    global _whisperx
+    if _whisperx is None:
+        try:
+            import whisperx
+        except ImportError:
+            return None
+        _whisperx = whisperx
+    return _whisperx
+
+# Diarization pipelines shared across Diarizer instances, keyed by
+# (token hash, device) so the pyannote weights are only loaded once per process
+_PIPELINE_CACHE: Dict[Tuple[str, str], Any] = {}
+_PIPELINE_CACHE_LOCK = threading.Lock()
+
+
+def _check_onnxruntime_gpu(device: str) -> None:
+    """Warn when CUDA is requested but onnxruntime can only run embeddings on CPU."""
+    if not device.startswith("cuda"):
+        return
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        # pyannote >= 3.1 runs embeddings in PyTorch; nothing to check
+        return
+    if "CUDAExecutionProvider" not in ort.get_available_providers():
+        print(
+            "Warning: onnxruntime has no CUDAExecutionProvider; speaker embeddings "
+            "will run on CPU. Install onnxruntime-gpu for GPU diarization."
+        )
+
+
+def _get_cached_pipeline(hf_token: str, device: str):
+    """Return a DiarizationPipeline, loading it on first use."""
+    key = (hashlib.sha256(hf_token.encode("utf-8")).hexdigest(), device)
+    with _PIPELINE_CACHE_LOCK:
+        pipeline = _PIPELINE_CACHE.get(key)
+        if pipeline is None:
+            _check_onnxruntime_gpu(device)
+            pipeline = _load_whisperx().DiarizationPipeline(
+                use_auth_token=hf_token,
+                device=device
+            )
+            _PIPELINE_CACHE[key] = pipeline
+        return pipeline
 
 
 class Diarizer:
@@ -19,7 +67,9 @@ class Diarizer:
         hf_token: Optional[str] = None,
         device: str = "cpu",
         min_speakers: Optional[int] = None,
-        max_speakers: Optional[int] = None
+        max_speakers: Optional[int] = None,
+        segmentation_batch_size: Optional[int] = None,
+        embedding_batch_size: Optional[int] = None
     ):
         """
         Initialize the diarizer.
@@ -29,11 +79,25 @@ class Diarizer:
             device: Device to use (cuda, cpu)
             min_speakers: Minimum number of speakers (optional)
             max_speakers: Maximum number of speakers (optional)
+            segmentation_batch_size: Batch size for the pyannote segmentation model (optional)
+            embedding_batch_size: Batch size for the pyannote embedding model (optional)
         """
         self.hf_token = hf_token or os.getenv("HF_TOKEN")
         self.device = device
         self.min_speakers = min_speakers
         self.max_speakers = max_speakers
+        self.segmentation_batch_size = segmentation_batch_size
+        self.embedding_batch_size = embedding_batch_size
+    
+    def _apply_batch_sizes(self, diarize_model) -> None:
+        """Forward batch size overrides to the underlying pyannote pipeline."""
+        pipeline = getattr(diarize_model, "model", None)
+        if pipeline is None:
+            return
+        if self.segmentation_batch_size is not None and hasattr(pipeline, "segmentation_batch_size"):
+            pipeline.segmentation_batch_size = self.segmentation_batch_size
+        if self.embedding_batch_size is not None and hasattr(pipeline, "embedding_batch_size"):
+            pipeline.embedding_batch_size = self.embedding_batch_size
     
     def diarize(
         self,
@@ -50,6 +114,24 @@ class Diarizer:
         Returns:
             Enhanced transcription result with speaker labels, or None if diarization unavailable
         """
+        diarize_segments = self.detect_speakers(audio_path)
+        if diarize_segments is None:
+            return None
+        return self.assign_speakers(diarize_segments, transcription_result)
+    
+    def detect_speakers(self, audio_path: str) -> Optional[Any]:
+        """
+        Run the diarization pipeline on audio.
+        
+        Needs only the audio, so it can run concurrently with transcription;
+        pass the result to assign_speakers() once the transcript is ready.
+        
+        Args:
+            audio_path: Path to audio file
+            
+        Returns:
+            Diarization segments from whisperx, or None if diarization unavailable
+        """
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
@@ -57,14 +139,12 @@ class Diarizer:
         if not self.hf_token:
             return None
         
-        if not WHISPERX_AVAILABLE:
+        if _load_whisperx() is None:
             return None
         
         try:
-            diarize_model = whisperx.DiarizationPipeline(
-                use_auth_token=self.hf_token,
-                device=self.device
-            )
+            diarize_model = _get_cached_pipeline(self.hf_token, self.device)
+            self._apply_batch_sizes(diarize_model)
         except Exception as e:
             raise RuntimeError(
                 f"Failed to load diarization model. "
@@ -73,17 +153,31 @@ class Diarizer:
         
         # Perform diarization
         try:
-            diarize_segments = diarize_model(
+            return diarize_model(
                 audio_path,
                 min_speakers=self.min_speakers,
                 max_speakers=self.max_speakers
             )
         except Exception as e:
             raise RuntimeError(f"Speaker diarization failed: {e}")
+    
+    def assign_speakers(
+        self,
+        diarize_segments: Any,
+        transcription_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Align diarization segments with transcription segments.
         
-        # Align diarization with transcription segments
+        Args:
+            diarize_segments: Result from detect_speakers()
+            transcription_result: Result from Transcriber.transcribe()
+            
+        Returns:
+            Transcription result with speaker labels
+        """
         try:
-            result = whisperx.assign_word_speakers(
+            result = _load_whisperx().assign_word_speakers(
                 diarize_segments,
                 transcription_result
             )
@@ -92,17 +186,110 @@ class Diarizer:
             print(f"Warning: Could not align speakers automatically: {e}")
             result = transcription_result.copy()
             # Try to add speaker info from diarization segments
-            if hasattr(diarize_segments, 'segments'):
+            if hasattr(diarize_segments, 'segments') or hasattr(diarize_segments, 'itertuples'):
                 result["diarization_segments"] = diarize_segments
             else:
                 result["diarization_segments"] = list(diarize_segments) if diarize_segments else []
         
         return result
     
+    @staticmethod
+    def _copy_for_labels(transcription_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy only the parts of a transcription result that get speaker labels
+        (segment and word dicts); text and other fields are shared.
+        """
+        merged = transcription_result.copy()
+        segments = []
+        words = []
+        for segment in transcription_result.get("segments", []):
+            segment_copy = dict(segment)
+            if "words" in segment:
+                segment_copy["words"] = [dict(word) for word in segment["words"]]
+                words.extend(segment_copy["words"])
+            segments.append(segment_copy)
+        merged["segments"] = segments
+        if "words" in transcription_result:
+            merged["words"] = words
+        return merged
+    
+    @staticmethod
+    def _speaker_intervals(
+        diarization_result: Dict[str, Any],
+        diarize_segments: Any = None
+    ) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """
+        Collect (start, end, speaker) intervals, sorted by start time.
+        
+        Prefers the raw diarization turns (`diarize_segments` from
+        detect_speakers(), or the copy kept when alignment failed); only falls
+        back to whisperx's speaker-labelled words/segments when neither exists.
+        """
+        intervals = []
+        raw = diarize_segments
+        if raw is None:
+            raw = diarization_result.get("diarization_segments")
+        if raw is not None and hasattr(raw, "itertuples"):
+            # pandas DataFrame from whisperx.DiarizationPipeline
+            for row in raw.itertuples(index=False):
+                intervals.append((float(row.start), float(row.end), str(row.speaker)))
+        elif raw is not None and len(raw):
+            for item in raw:
+                if isinstance(item, dict) and "speaker" in item:
+                    intervals.append((float(item.get("start", 0.0)), float(item.get("end", 0.0)), str(item["speaker"])))
+        else:
+            for segment in diarization_result.get("segments", []):
+                words = [w for w in segment.get("words", []) if "speaker" in w and "start" in w]
+                if words:
+                    for w in words:
+                        intervals.append((float(w["start"]), float(w.get("end", w["start"])), str(w["speaker"])))
+                elif "speaker" in segment:
+                    intervals.append((float(segment.get("start", 0.0)), float(segment.get("end", 0.0)), str(segment["speaker"])))
+        
+        intervals.sort(key=lambda item: item[0])
+        starts = np.array([item[0] for item in intervals], dtype=np.float64)
+        ends = np.array([item[1] for item in intervals], dtype=np.float64)
+        labels = [item[2] for item in intervals]
+        return starts, ends, labels
+    
+    @staticmethod
+    def _lookup_speakers(
+        starts: np.ndarray,
+        ends: np.ndarray,
+        labels: List[str],
+        times: np.ndarray
+    ) -> List[Optional[str]]:
+        """
+        Find the speaker of the interval containing each time (None if none).
+        
+        Pyannote turns overlap, so the last turn starting before t may have
+        ended while an earlier, longer one still covers t. The latest-starting
+        covering turn wins; otherwise the turn with the running max end does.
+        """
+        if not len(times) or not len(starts):
+            return [None] * len(times)
+        idx = np.searchsorted(starts, times, side="right") - 1
+        safe_idx = np.clip(idx, 0, len(starts) - 1)
+        started = idx >= 0
+        # Running max of ends and the turn that reaches it, in start order
+        max_ends = np.maximum.accumulate(ends)
+        positions = np.arange(len(ends))
+        max_idx = np.maximum.accumulate(np.where(ends >= max_ends, positions, 0))
+        direct = started & (ends[safe_idx] >= times)
+        covered = started & (max_ends[safe_idx] >= times)
+        chosen = np.where(direct, safe_idx, max_idx[safe_idx])
+        return [
+            labels[i] if ok else None
+            for i, ok in zip(chosen.tolist(), covered.tolist())
+        ]
+    
     def merge_with_transcription(
         self,
         transcription_result: Dict[str, Any],
-        diarization_result: Optional[Dict[str, Any]]
+        diarization_result: Optional[Dict[str, Any]],
+        *,
+        diarize_segments: Any = None,
+        inplace: bool = False
     ) -> Dict[str, Any]:
         """
         Merge transcription and diarization results into structured format.
@@ -110,30 +297,57 @@ class Diarizer:
         Args:
             transcription_result: Result from Transcriber.transcribe()
             diarization_result: Result from Diarizer.diarize() or None if unavailable
+            diarize_segments: Raw speaker turns from detect_speakers(); words and
+                segments are labelled from these when given
+            inplace: Label transcription_result's own segments and words instead of
+                copying them first (use when the input won't be reused)
             
         Returns:
             Merged result with speaker labels (or original if diarization unavailable)
         """
-        merged = transcription_result.copy()
-        
         # If no diarization result, return transcription as-is
         if not diarization_result:
-            return merged
-        
-        # Add speaker information to segments
-        if "segments" in diarization_result:
-            for i, segment in enumerate(diarization_result["segments"]):
-                if i < len(merged["segments"]):
-                    merged["segments"][i]["speaker"] = segment.get("speaker", "SPEAKER_00")
-                    
-                    # Add speaker info to words if available
-                    if "words" in segment and "words" in merged["segments"][i]:
-                        word_speaker_map = {
-                            word.get("word"): word.get("speaker", "SPEAKER_00")
-                            for word in segment["words"]
-                        }
-                        for word in merged["segments"][i]["words"]:
-                            word["speaker"] = word_speaker_map.get(word["word"], "SPEAKER_00")
+            return transcription_result if inplace else transcription_result.copy()
+        
+        merged = transcription_result if inplace else self._copy_for_labels(transcription_result)
+        
+        # Label words by the speaker turn covering their midpoint, then give
+        # each segment its majority word speaker. Words outside every turn keep
+        # any existing label but don't vote; a segment without votes keeps its
+        # existing speaker, else takes the turn covering its midpoint.
+        starts, ends, labels = self._speaker_intervals(diarization_result, diarize_segments)
+        if len(starts):
+            segments = merged.get("segments", [])
+            words = [word for segment in segments for word in segment.get("words", [])]
+            word_speakers = self._lookup_speakers(
+                starts, ends, labels,
+                np.fromiter(
+                    (0.5 * (w.get("start", 0.0) + w.get("end", 0.0)) for w in words),
+                    dtype=np.float64,
+                    count=len(words)
+                )
+            )
+            assigned = set()
+            for word, speaker in zip(words, word_speakers):
+                if speaker is not None:
+                    word["speaker"] = speaker
+                    assigned.add(id(word))
+            
+            segment_mids = np.fromiter(
+                (0.5 * (s.get("start", 0.0) + s.get("end", 0.0)) for s in segments),
+                dtype=np.float64,
+                count=len(segments)
+            )
+            segment_speakers = self._lookup_speakers(starts, ends, labels, segment_mids)
+            for segment, fallback in zip(segments, segment_speakers):
+                votes: Dict[str, int] = {}
+                for word in segment.get("words", []):
+                    if id(word) in assigned:
+                        votes[word["speaker"]] = votes.get(word["speaker"], 0) + 1
+                if votes:
+                    segment["speaker"] = max(votes, key=votes.get)
+                elif "speaker" not in segment and fallback is not None:
+                    segment["speaker"] = fallback
         
         # Extract unique speakers
         speakers = set()
@@ -1,62 +1,287 @@
 """ASR transcription using Faster Whisper"""
 
 import os
-from typing import List, Dict, Any, Optional
-from faster_whisper import WhisperModel
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterable, List, Dict, Any, Optional, Tuple, Union
+
+# faster_whisper pulls in ctranslate2/onnxruntime/numpy, so it is imported
+# on first model load rather than when this module is imported
+if TYPE_CHECKING:
+    import numpy as np
+    from faster_whisper import WhisperModel
+
+# Loaded models shared across Transcriber instances, keyed by load options.
+# Bounded LRU so switching model sizes doesn't pin every set of weights.
+_MODEL_CACHE_SIZE = 4
+_MODEL_CACHE: "OrderedDict[Tuple[Any, ...], WhisperModel]" = OrderedDict()
+_MODEL_CACHE_LOCK = threading.Lock()
+
+# Whisper expects 16kHz mono input
+SAMPLE_RATE = 16000
+
+# Number of decoded chunks the prefetch thread may hold ahead of inference
+_PREFETCH_DEPTH = 2
+
+# Silero VAD settings shared by the in-model and prefetch-thread VAD passes
+_VAD_PARAMETERS = dict(min_silence_duration_ms=500)
+
+# Whisper decodes clip_timestamps one 30s window at a time, so speech regions
+# are packed into windows up to this long before being passed as clips
+_CLIP_WINDOW_SECONDS = 30.0
+
+
+# Short names accepted for model_size, mapped to the faster-whisper model ids
+_MODEL_ALIASES = {
+    "turbo": "large-v3-turbo",
+    "distil": "distil-large-v3",
+}
+
+
+def _cuda_available() -> bool:
+    # ctranslate2 is what actually runs Whisper and is much lighter to import
+    # than torch; fall back to torch for builds without the query
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        pass
+    try:
+        import torch
+        return bool(torch.cuda.is_available())
+    except Exception:
+        return False
+
+
+def resolve_device(device: str = "auto") -> str:
+    """Resolve "auto" to cuda when a CUDA device is visible to CTranslate2, else cpu."""
+    if not device or device == "auto":
+        return "cuda" if _cuda_available() else "cpu"
+    return device
+
+
+def _cpu_has_vnni() -> bool:
+    """Check CPU flags for AVX-VNNI / AVX512-VNNI (fast int8 dot products)."""
+    try:
+        with open("/proc/cpuinfo", "r") as f:
+            flags = f.read()
+    except OSError:
+        # No cpuinfo (macOS/Windows): assume int8 kernels are worthwhile
+        return True
+    return "avx512_vnni" in flags or "avx_vnni" in flags
+
+
+def _get_cached_model(
+    model_size: str,
+    device: str,
+    compute_type: str,
+    cpu_threads: int,
+    num_workers: int = 1,
+    flash_attention: bool = False
+) -> "WhisperModel":
+    """Return a loaded WhisperModel, reusing one from the process cache if present."""
+    from faster_whisper import WhisperModel
+    
+    key = (model_size, device, compute_type, cpu_threads, num_workers, flash_attention)
+    with _MODEL_CACHE_LOCK:
+        model = _MODEL_CACHE.get(key)
+        if model is not None:
+            _MODEL_CACHE.move_to_end(key)
+            return model
+        load_kwargs = dict(
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=num_workers
+        )
+        if flash_attention:
+            try:
+                model = WhisperModel(model_size, flash_attention=True, **load_kwargs)
+            except (TypeError, ValueError) as e:
+                # Older faster-whisper/ctranslate2 builds don't accept the flag
+                print(f"Warning: Flash attention unavailable, loading without it: {e}")
+                model = WhisperModel(model_size, **load_kwargs)
+        else:
+            model = WhisperModel(model_size, **load_kwargs)
+        _MODEL_CACHE[key] = model
+        while len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+        return model
+
+
+def _drop_page_cache(path: str) -> None:
+    """Ask the OS to evict a file's cached pages (Linux); a no-op elsewhere."""
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _speech_clips(audio: "np.ndarray") -> Optional[List[float]]:
+    """
+    Run Silero VAD on a waveform and return speech windows as flat [start, end, ...] seconds.
+    
+    Each clip costs at least one 30s encoder pass, so adjacent regions
+    (roughly one per utterance) are merged into windows of at most
+    _CLIP_WINDOW_SECONDS, as faster-whisper's batched merge_segments does.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    
+    speech = get_speech_timestamps(
+        audio, VadOptions(**_VAD_PARAMETERS, max_speech_duration_s=_CLIP_WINDOW_SECONDS)
+    )
+    if not speech:
+        return None
+    window = _CLIP_WINDOW_SECONDS * SAMPLE_RATE
+    clips: List[float] = []
+    start, end = speech[0]["start"], speech[0]["end"]
+    for region in speech[1:]:
+        if region["end"] - start > window:
+            clips.extend((start / SAMPLE_RATE, end / SAMPLE_RATE))
+            start = region["start"]
+        end = region["end"]
+    clips.extend((start / SAMPLE_RATE, end / SAMPLE_RATE))
+    return clips
+
+
+def resolve_compute_type(device: str, compute_type: str = "auto") -> str:
+    """
+    Resolve an "auto" compute type to a quantized one for the target device.
+    
+    GPU uses int8_float16 (int8 weights, float16 activations). CPU uses int8,
+    or int8_float32 when the CPU lacks VNNI and full int8 kernels are slower.
+    Any explicit compute type (e.g. float16 for strict parity) is returned as-is.
+    
+    Args:
+        device: Device to use (cuda, cpu, auto)
+        compute_type: Requested compute type
+        
+    Returns:
+        Concrete compute type to pass to WhisperModel
+    """
+    if compute_type != "auto":
+        return compute_type
+    if device == "cuda" or (device == "auto" and _cuda_available()):
+        return "int8_float16"
+    return "int8" if _cpu_has_vnni() else "int8_float32"
 
 
 class Transcriber:
     """Transcriber using Faster Whisper for fast local transcription"""
     
+    # A chunk's detected language is reused for later chunks (skipping their
+    # detection pass) only at this confidence; intro music or silence is not
+    LANGUAGE_PIN_PROBABILITY = 0.5
+    
     def __init__(
         self,
         model_size: str = "base",
         device: str = "auto",
         compute_type: str = "auto",
         language: Optional[str] = None,
-        cpu_threads: int = 4
+        cpu_threads: int = 4,
+        num_workers: int = 1,
+        batch_size: int = 8,
+        use_flash_attention: bool = True
     ):
         """
         Initialize the transcriber.
         
         Args:
-            model_size: Whisper model size
+            model_size: Whisper model size or id ("turbo" and "distil" are
+                shorthands for large-v3-turbo and distil-large-v3)
             device: Device to use (cuda, cpu, auto)
-            compute_type: Compute type (int8, int8_float16, float16, float32, auto)
+            compute_type: Compute type (int8, int8_float16, float16, float32, auto).
+                "auto" picks int8_float16 on GPU and int8 on CPU; pass float16
+                or float32 explicitly to disable quantization.
             language: Language code
-            cpu_threads: Number of threads for CPU inference
+            cpu_threads: Number of intra-op threads per CPU inference call
+            num_workers: Number of model workers for concurrent transcribe() calls.
+                Each worker runs with cpu_threads threads, so keep
+                num_workers * cpu_threads at or below the core count; the
+                default of 1 is right unless transcribing from several threads.
+            batch_size: Number of audio windows decoded per forward pass in batched mode
+            use_flash_attention: Use CTranslate2 flash attention on CUDA (ignored on CPU).
+                The first transcription after loading is slower while kernels warm up.
         """
-        self.model_size = model_size
-        self.device = device
-        self.compute_type = compute_type
+        self.model_size = _MODEL_ALIASES.get(model_size, model_size)
+        # Resolved up front so "auto" on a GPU gets GPU-only options
+        # (flash attention, int8_float16) just like an explicit "cuda"
+        self.device = resolve_device(device)
+        self.compute_type = resolve_compute_type(self.device, compute_type)
         self.language = language
         self.cpu_threads = cpu_threads
-        self.model: Optional[WhisperModel] = None
+        self.num_workers = max(1, num_workers)
+        self.batch_size = batch_size
+        self.use_flash_attention = use_flash_attention
+        self.model: Optional["WhisperModel"] = None
+        # BatchedInferencePipeline class when available. Pipelines keep
+        # per-call state (e.g. last_speech_timestamp), so each thread gets its
+        # own around the shared model.
+        self._batched_pipeline_cls = None
+        self._batched_local = threading.local()
     
     def _load_model(self):
-        """Lazy load the model"""
+        """Lazy load the model (shared with other instances using the same options)"""
         if self.model is None:
-            self.model = WhisperModel(
+            self.model = _get_cached_model(
                 self.model_size,
-                device=self.device,
-                compute_type=self.compute_type,
-                cpu_threads=self.cpu_threads,
-                num_workers=self.cpu_threads
+                self.device,
+                self.compute_type,
+                self.cpu_threads,
+                num_workers=self.num_workers,
+                flash_attention=self.use_flash_attention and self.device == "cuda"
             )
+        if self._batched_pipeline_cls is None:
+            try:
+                from faster_whisper import BatchedInferencePipeline
+            except ImportError:
+                # Older faster-whisper: keep using the serial path
+                return
+            self._batched_pipeline_cls = BatchedInferencePipeline
+    
+    @property
+    def batched_model(self):
+        """This thread's BatchedInferencePipeline over the shared model, or None."""
+        if self._batched_pipeline_cls is None or self.model is None:
+            return None
+        pipeline = getattr(self._batched_local, "pipeline", None)
+        if pipeline is None or pipeline.model is not self.model:
+            pipeline = self._batched_pipeline_cls(model=self.model)
+            self._batched_local.pipeline = pipeline
+        return pipeline
+    
+    def preload(self) -> None:
+        """Load the model now, e.g. on a background thread while audio is extracted."""
+        self._load_model()
     
     def transcribe(
         self,
-        audio_path: str,
+        audio_path: Union[str, "np.ndarray"],
         word_timestamps: bool = True,
-        vad_filter: bool = True
+        vad_filter: bool = True,
+        batched: bool = False
     ) -> Dict[str, Any]:
         """
         Transcribe audio file with timestamps.
         
         Args:
-            audio_path: Path to audio file
+            audio_path: Path to audio file, or an already-decoded 16kHz float32
+                waveform (e.g. from utils.video.extract_audio_array)
             word_timestamps: Whether to include word-level timestamps
             vad_filter: Whether to use Voice Activity Detection filter
+            batched: Decode speech windows in batches of `batch_size` when
+                BatchedInferencePipeline is available
             
         Returns:
             Dictionary containing:
@@ -65,49 +290,105 @@ class Transcriber:
                 - language: Detected language
                 - words: List of words with timestamps (if word_timestamps=True)
         """
-        if not os.path.exists(audio_path):
+        if isinstance(audio_path, str) and not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        self._load_model()
-        
-        # Transcribe with word-level timestamps
-        segments, info = self.model.transcribe(
+        return self._transcribe_audio(
             audio_path,
-            language=self.language,
             word_timestamps=word_timestamps,
             vad_filter=vad_filter,
-            vad_parameters=dict(min_silence_duration_ms=500) if vad_filter else None
+            batched=batched
         )
+    
+    def _transcribe_audio(
+        self,
+        audio: Union[str, "np.ndarray"],
+        word_timestamps: bool = True,
+        vad_filter: bool = True,
+        batched: bool = False,
+        offset: float = 0.0,
+        language: Optional[str] = None,
+        clip_timestamps: Optional[List[float]] = None
+    ) -> Dict[str, Any]:
+        """
+        Transcribe an audio path or a decoded 16kHz float32 waveform.
+        
+        Shared by transcribe() and transcribe_chunks() so both produce the
+        same segment/word structure. `offset` is added to every segment and
+        word timestamp as it is built, so chunked callers don't need a
+        second pass over the result. `language` overrides self.language
+        (a known language skips faster-whisper's detection pass).
+        `clip_timestamps` are precomputed speech regions ([start, end, ...] in
+        seconds); when given, the serial path decodes only those regions and
+        skips its own VAD pass.
+        """
+        self._load_model()
+        language = language or self.language
+        
+        # Transcribe with word-level timestamps
+        vad_parameters = _VAD_PARAMETERS if vad_filter else None
+        batched_model = self.batched_model if batched and vad_filter else None
+        if batched_model is not None:
+            # Batched pipeline splits audio into VAD windows and decodes
+            # `batch_size` of them per forward pass instead of one at a time.
+            # It needs VAD (or explicit clip timestamps) to find those windows.
+            segments, info = batched_model.transcribe(
+                audio,
+                language=language,
+                batch_size=self.batch_size,
+                word_timestamps=word_timestamps,
+                vad_filter=vad_filter,
+                vad_parameters=vad_parameters
+            )
+        elif clip_timestamps:
+            segments, info = self.model.transcribe(
+                audio,
+                language=language,
+                word_timestamps=word_timestamps,
+                vad_filter=False,
+                clip_timestamps=clip_timestamps
+            )
+        else:
+            segments, info = self.model.transcribe(
+                audio,
+                language=language,
+                word_timestamps=word_timestamps,
+                vad_filter=vad_filter,
+                vad_parameters=vad_parameters
+            )
         
-        # Convert segments to list and extract data
-        segment_list = []
+        # Run the lazy segment generator to completion, then fill
+        # pre-sized output lists instead of growing them one append at a time
+        segments = list(segments)
+        segment_list: List[Optional[Dict[str, Any]]] = [None] * len(segments)
+        full_text_parts: List[str] = [""] * len(segments)
         word_list = []
-        full_text_parts = []
+        extend_words = word_list.extend
         
-        for segment in segments:
+        for i, segment in enumerate(segments):
+            text = segment.text.strip()
             segment_data = {
                 "id": segment.id,
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text.strip()
+                "start": segment.start + offset,
+                "end": segment.end + offset,
+                "text": text
             }
             
             if word_timestamps and segment.words:
-                segment_words = []
-                for word in segment.words:
-                    word_data = {
+                segment_words = [
+                    {
                         "word": word.word,
-                        "start": word.start,
-                        "end": word.end,
+                        "start": word.start + offset,
+                        "end": word.end + offset,
                         "probability": word.probability
                     }
-                    segment_words.append(word_data)
-                    word_list.append(word_data)
-                
+                    for word in segment.words
+                ]
+                extend_words(segment_words)
                 segment_data["words"] = segment_words
             
-            segment_list.append(segment_data)
-            full_text_parts.append(segment_data["text"])
+            segment_list[i] = segment_data
+            full_text_parts[i] = text
         
         result = {
             "text": " ".join(full_text_parts),
@@ -123,19 +404,27 @@ class Transcriber:
     
     def transcribe_chunks(
         self,
-        chunks: list,
+        chunks: Iterable[Tuple[str, float]],
         word_timestamps: bool = True,
         vad_filter: bool = True,
-        on_progress=None
+        on_progress=None,
+        num_chunks: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Transcribe multiple audio chunks and merge with offset-corrected timestamps.
         
+        With num_workers > 1, chunks are decoded and transcribed concurrently
+        (one chunk per model worker); otherwise they run one at a time with
+        the next chunk decoded in the background. `chunks` may be a lazy
+        iterator (e.g. utils.video.iter_audio_chunks), in which case chunks
+        are pulled as they are produced and extraction overlaps transcription.
+        
         Args:
-            chunks: List of (chunk_audio_path, offset_seconds) tuples
+            chunks: List or iterator of (chunk_audio_path, offset_seconds) tuples
             word_timestamps: Whether to include word-level timestamps
             vad_filter: Whether to use Voice Activity Detection filter
             on_progress: Optional callback(chunk_index, total_chunks) for progress
+            num_chunks: Expected number of chunks; required when `chunks` is an iterator
             
         Returns:
             Merged transcription result with globally-corrected timestamps
@@ -143,47 +432,92 @@ class Transcriber:
         all_segments = []
         all_words = []
         all_text_parts = []
-        language = None
-        language_probability = None
+        language = self.language
+        language_probability = 1.0 if self.language else None
+        # Language passed to each chunk; None lets the chunk detect its own
+        pinned_language = self.language
         segment_id_counter = 0
         
-        for idx, (chunk_path, offset) in enumerate(chunks):
+        # Without the batched pipeline, run VAD next to decoding (prefetch
+        # thread or chunk worker) instead of inside each transcribe call
+        self._load_model()
+        run_vad = vad_filter and self._batched_pipeline_cls is None
+        progress_lock = threading.Lock()
+        total_chunks = len(chunks) if num_chunks is None else num_chunks
+        
+        def transcribe_chunk(idx: int, audio, offset: float, speech_clips) -> Dict[str, Any]:
+            nonlocal pinned_language
             if on_progress:
-                on_progress(idx + 1, len(chunks))
-            
-            # Transcribe this chunk
-            chunk_result = self.transcribe(
-                chunk_path,
+                with progress_lock:
+                    on_progress(idx + 1, total_chunks)
+            # Transcribe this chunk (batched when the pipeline is available)
+            chunk_result = self._transcribe_audio(
+                audio,
                 word_timestamps=word_timestamps,
-                vad_filter=vad_filter
+                vad_filter=vad_filter,
+                batched=True,
+                offset=offset,
+                language=pinned_language,
+                clip_timestamps=speech_clips
             )
+            # Pin the first confident detection so later chunks skip detection
+            if (
+                pinned_language is None
+                and (chunk_result.get("language_probability") or 0.0) >= self.LANGUAGE_PIN_PROBABILITY
+            ):
+                pinned_language = chunk_result.get("language")
+            return chunk_result
+        
+        def chunk_results():
+            if self.num_workers > 1 and total_chunks > 1:
+                # Model workers decode chunks in parallel; each task decodes
+                # its own audio. The first chunk runs alone when the language
+                # is unknown so the rest can be pinned to it if it is confident.
+                remaining = enumerate(chunks)
+                if pinned_language is None:
+                    item = next(remaining, None)
+                    if item is None:
+                        return
+                    idx, (chunk_path, offset) = item
+                    yield transcribe_chunk(idx, *self._decode_chunk(chunk_path, offset, run_vad))
+                
+                def decode_and_transcribe(item):
+                    idx, (chunk_path, offset) = item
+                    return transcribe_chunk(idx, *self._decode_chunk(chunk_path, offset, run_vad))
+                
+                with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+                    # map() submits each chunk as the iterator produces it and
+                    # yields in chunk order, keeping the merge deterministic
+                    yield from executor.map(decode_and_transcribe, remaining)
+                return
             
-            # Use language from first chunk (most reliable detection)
-            if language is None:
+            for idx, (audio, offset, speech_clips) in enumerate(
+                self._prefetch_chunks(chunks, run_vad=run_vad)
+            ):
+                yield transcribe_chunk(idx, audio, offset, speech_clips)
+        
+        for chunk_result in chunk_results():
+            # Report the first confident detection in chunk order, else the
+            # first chunk's guess
+            chunk_probability = chunk_result.get("language_probability") or 0.0
+            if language is None or (
+                (language_probability or 0.0) < self.LANGUAGE_PIN_PROBABILITY
+                and chunk_probability >= self.LANGUAGE_PIN_PROBABILITY
+            ):
                 language = chunk_result.get("language")
-                language_probability = chunk_result.get("language_probability")
+                language_probability = chunk_probability
             
-            # Offset all timestamps by the chunk's global offset
-            for segment in chunk_result.get("segments", []):
+            # Timestamps already carry the chunk's global offset; only the
+            # segment ids need renumbering to stay unique across chunks
+            chunk_segments = chunk_result["segments"]
+            for segment in chunk_segments:
                 segment_id_counter += 1
                 segment["id"] = segment_id_counter
-                segment["start"] = segment.get("start", 0) + offset
-                segment["end"] = segment.get("end", 0) + offset
-                
-                if "words" in segment:
-                    for word in segment["words"]:
-                        word["start"] = word.get("start", 0) + offset
-                        word["end"] = word.get("end", 0) + offset
-                        all_words.append(word)
-                
-                all_segments.append(segment)
-                all_text_parts.append(segment.get("text", ""))
             
-            # Also offset standalone words list
+            all_segments.extend(chunk_segments)
+            all_text_parts.extend(segment["text"] for segment in chunk_segments)
             if word_timestamps:
-                for word in chunk_result.get("words", []):
-                    # Only add if not already added via segments
-                    pass  # Words are already collected from segments above
+                all_words.extend(chunk_result["words"])
         
         result = {
             "text": " ".join(all_text_parts),
@@ -197,6 +531,59 @@ class Transcriber:
         
         return result
     
+    def _decode_chunk(self, chunk_path: str, offset: float, run_vad: bool = False) -> Tuple["np.ndarray", float, Optional[List[float]]]:
+        """Decode one chunk file to a 16kHz waveform, with its speech regions when run_vad."""
+        from faster_whisper import decode_audio
+        
+        if not os.path.exists(chunk_path):
+            raise FileNotFoundError(f"Audio file not found: {chunk_path}")
+        # Decode once and hand the waveform straight to the model
+        audio = decode_audio(chunk_path, sampling_rate=SAMPLE_RATE)
+        # The file is never read again; free its page cache for the model
+        # instead of holding every chunk WAV in RAM until cleanup
+        _drop_page_cache(chunk_path)
+        speech_clips = _speech_clips(audio) if run_vad else None
+        return audio, offset, speech_clips
+    
+    def _prefetch_chunks(self, chunks: Iterable[Tuple[str, float]], run_vad: bool = False):
+        """
+        Yield (waveform, offset, speech_clips) tuples, decoding upcoming chunks
+        on a background thread while the current one is being transcribed.
+        
+        With run_vad, speech_clips holds the chunk's speech regions as
+        [start, end, ...] seconds; otherwise (or if no speech was found) it is None.
+        """
+        decoded: "queue.Queue[Any]" = queue.Queue(maxsize=_PREFETCH_DEPTH)
+        stop = threading.Event()
+        done = object()
+        
+        def producer():
+            try:
+                for chunk_path, offset in chunks:
+                    if stop.is_set():
+                        return
+                    decoded.put(self._decode_chunk(chunk_path, offset, run_vad))
+                decoded.put(done)
+            except Exception as e:
+                decoded.put(e)
+        
+        thread = threading.Thread(target=producer, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = decoded.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # Unblock the producer if the consumer stops early
+            stop.set()
+            while not decoded.empty():
+                decoded.get_nowait()
+            thread.join(timeout=1.0)
+    
     def __enter__(self):
         """Context manager entry"""
         return self
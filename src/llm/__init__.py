@@ -2,5 +2,6 @@
 
 from .provider import LLMProvider, get_llm_provider
 from .agent import ShortsAgent
+from .cache import ResponseCache
 
-__all__ = ["LLMProvider", "get_llm_provider", "ShortsAgent"]
+__all__ = ["LLMProvider", "get_llm_provider", "ShortsAgent", "ResponseCache"]
@@ -1,16 +1,28 @@
 """Langchain agent for short selection"""
 
+import bisect
+import functools
+import hashlib
 import json
+import math
 import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, Optional, List
+import numpy as np
 from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import SystemMessage
 from langchain_core.output_parsers import PydanticOutputParser
-import re
+from langchain_core.runnables import RunnableLambda
 
 from ..models.output import ShortsOutput, ShortClient
-from ..utils import refine_shorts_output
+from ..utils import refine_shorts_output, json_loads
+from .cache import ResponseCache
 from .prompts import (
     get_shorts_selection_prompt,
+    get_shorts_batch_selection_prompt,
     get_shorts_repair_prompt,
     get_titles_reasons_prompt,
     format_transcript_for_llm,
@@ -18,21 +30,413 @@ from .prompts import (
 )
 
 
+# Patterns used on every LLM response, compiled once at import
+# <think>...</think> blocks (DeepSeek R1 style) and markdown code fences
+_RESPONSE_NOISE_RE = re.compile(r'<think>.*?</think>|```(?:json)?\s*', re.DOTALL)
+# All JSON repairs in one alternation so _clean_json_content scans once.
+# String literals are matched (and kept) so "//" or "}{" inside them survive.
+_COMMENT = r'//[^\n]*|/\*.*?\*/'
+_CLEAN_RE = re.compile(
+    # Timecodes on start/end times (e.g., 10.56.39.32 or 00:10:56.39)
+    r'(?P<timecode>"(?P<tc_key>(?:start|end)_time)"\s*:\s*(?P<tc_val>[0-9]+(?:[.:][0-9]+){2,3}))'
+    # Quoted times with units (e.g., "start_time": "10.5s")
+    r'|(?P<unit>"(?P<unit_key>(?:start|end)_time)"\s*:\s*"(?P<unit_val>[\d\.]+)(?:s|sec|secs)?")'
+    r'|(?P<string>"(?:[^"\\]|\\.)*")'
+    r'|(?P<comment>' + _COMMENT + r')'
+    # Missing comma between objects in an array
+    r'|(?P<missing_comma>}(?:\s|' + _COMMENT + r')*{)'
+    # Trailing comma before a closing bracket/brace
+    r'|(?P<trailing_comma>,(?:\s|' + _COMMENT + r')*(?=[\]}]))',
+    re.DOTALL
+)
+# Structural tokens of a JSON object: braces and string literals (an
+# unterminated string runs to the end of the text)
+_JSON_TOKEN_RE = re.compile(r'[{}]|"(?:[^"\\]|\\.)*(?:"|\\?\Z)', re.DOTALL)
+_SHORTS_SALVAGE_RE = re.compile(
+    r'"title"\s*:\s*"(?P<title>[^"]+)"[^{}]*?'
+    r'"start_time"\s*:\s*(?P<start>[0-9:.]+)[^{}]*?'
+    r'"end_time"\s*:\s*(?P<end>[0-9:.]+)',
+    re.DOTALL
+)
+_TIME_FULL_RE = re.compile(r"\d+(\.\d+)?")
+# Input is whitespace-normalized, so sentence breaks are single spaces
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?]) ')
+_NON_LATIN_RE = re.compile(r'[\u0600-\u06FF\u0750-\u077F\u08A0-\u08FF\u0900-\u097F]')
+_TITLE_CUT_CONNECTORS = (" because ", " that ", " which ", " so ", " but ", " and ", " if ", " when ", " after ")
+_LEADING_ARTICLE_RE = re.compile(r'^(the|a|an|this|that|these|those|it|they|we|i|he|she)\s+', re.IGNORECASE)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_time_string(value: str) -> Optional[float]:
+    """Parse a seconds or timecode-like string into seconds (memoized)."""
+    raw = value.strip().lower().replace("sec", "").replace("secs", "").replace("s", "")
+    raw = raw.strip()
+    if raw == "":
+        return None
+
+    # If it looks like a plain float, parse directly
+    if _TIME_FULL_RE.fullmatch(raw):
+        try:
+            return float(raw)
+        except ValueError:
+            return None
+
+    # Timecode patterns: HH:MM:SS(.ms) or MM:SS(.ms) or dot-separated
+    if ":" in raw:
+        parts = raw.split(":")
+    elif raw.count(".") >= 2:
+        parts = raw.split(".")
+    else:
+        return None
+
+    try:
+        if len(parts) == 2:
+            minutes = int(parts[0])
+            seconds = float(parts[1])
+            return minutes * 60 + seconds
+        if len(parts) == 3:
+            hours = int(parts[0])
+            minutes = int(parts[1])
+            seconds = float(parts[2])
+            return hours * 3600 + minutes * 60 + seconds
+        if len(parts) == 4:
+            hours = int(parts[0])
+            minutes = int(parts[1])
+            seconds = int(parts[2])
+            millis = int(parts[3])
+            return hours * 3600 + minutes * 60 + seconds + (millis / 100.0)
+    except ValueError:
+        return None
+
+    return None
+
+
+def _find_json_object(content: str, key: Optional[str] = None) -> Optional[tuple]:
+    """
+    Locate a balanced top-level {...} span in one pass, ignoring braces in strings.
+    
+    Args:
+        content: Text that may contain a JSON object among other output
+        key: Prefer the first object containing this key (e.g. "shorts")
+        
+    Returns:
+        (start, end) slice bounds, or None if no balanced object exists
+    """
+    first = None
+    needle = f'"{key}"' if key else None
+    pos = content.find("{")
+    while pos >= 0:
+        # Inside an object, jump between braces and whole string literals in C
+        depth = 0
+        start = pos
+        for match in _JSON_TOKEN_RE.finditer(content, pos):
+            token = match.group()
+            if token == "{":
+                depth += 1
+            elif token == "}":
+                depth -= 1
+                if depth == 0:
+                    end = match.end()
+                    span = (start, end)
+                    if needle is None or needle in content[start:end]:
+                        return span
+                    if first is None:
+                        first = span
+                    break
+        else:
+            # Unbalanced to the end of the text
+            return first
+        pos = content.find("{", end)
+    return first
+
+
+class _JsonObjectScanner:
+    """
+    Incrementally track brace depth of streamed LLM output so the stream can
+    stop as soon as the top-level "shorts" object is complete.
+    
+    Each second-level object (a short inside the "shorts" array) is decoded
+    as soon as its closing brace arrives and collected in `items`, so shorts
+    from a truncated or otherwise unparseable response can still be used.
+    
+    Text inside <think>...</think> blocks and inside JSON strings is ignored.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.in_think = False
+        self.recent = ""
+        self.current: List[str] = []
+        self.item_start = -1
+        self.items: List[Dict[str, Any]] = []
+    
+    def feed(self, text: str) -> bool:
+        """Consume a streamed chunk; return True once a complete shorts object was seen."""
+        for ch in text:
+            self.recent = (self.recent + ch)[-8:]
+            if self.in_think:
+                if self.recent.endswith("</think>"):
+                    self.in_think = False
+                continue
+            if not self.in_string and self.recent.endswith("<think>"):
+                self.in_think = True
+                self.depth = 0
+                self.current = []
+                self.item_start = -1
+                self.items = []
+                continue
+            if self.depth > 0:
+                self.current.append(ch)
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"' and self.depth > 0:
+                self.in_string = True
+            elif ch == "{":
+                if self.depth == 0:
+                    self.current = [ch]
+                elif self.depth == 1:
+                    self.item_start = len(self.current) - 1
+                self.depth += 1
+            elif ch == "}" and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 1 and self.item_start >= 0:
+                    self._collect_item("".join(self.current[self.item_start:]))
+                    self.item_start = -1
+                elif self.depth == 0:
+                    if '"shorts"' in "".join(self.current):
+                        return True
+                    self.current = []
+        return False
+    
+    def _collect_item(self, text: str) -> None:
+        try:
+            item = json_loads(text)
+        except json.JSONDecodeError:
+            return
+        if isinstance(item, dict) and "start_time" in item and "end_time" in item:
+            self.items.append(item)
+
+
+_BAD_TITLES = frozenset({
+    "compelling title",
+    "end time",
+    "full transcript",
+    "key supporting clip",
+    "the core message",
+    "longer clips from different sections",
+    "the aerial",
+    "the end of the first day",
+    "a character from a charles dickens novel",
+    "untitled segment",
+    "untitled",
+    "auto clip",
+})
+
+
+def _is_generic_reason(reason: str) -> bool:
+    r = reason.strip().lower()
+    if r in {"", "n/a"}:
+        return True
+    if len(r.split()) < 5:
+        return True
+    if r.startswith("auto-generated"):
+        return True
+    return False
+
+
+def _is_generic_title(title: str) -> bool:
+    t = title.strip().lower()
+    if t in _BAD_TITLES:
+        return True
+    if t.startswith(("like ", "because ", "so ", "then ", "yeah ")):
+        return True
+    if len(t.split()) <= 2 and t in {"clip", "segment", "highlight"}:
+        return True
+    return False
+
+
+def _extract_sentences(text: str) -> list[str]:
+    # Collapse whitespace runs (newlines included) without the regex engine
+    cleaned = " ".join(text.split())
+    if not cleaned:
+        return []
+    sentences = _SENTENCE_SPLIT_RE.split(cleaned)
+    return [stripped for stripped in (s.strip(" .?!") for s in sentences) if stripped]
+
+
+def _make_title_from_text(text: str) -> str:
+    sentences = _extract_sentences(text)
+    if not sentences:
+        return ""
+    sentence = sentences[0]
+    # Cut at each clause connector in turn; the fixed order matters, since
+    # an earlier cut can remove a connector later in the list
+    lower = sentence.lower()
+    for delim in _TITLE_CUT_CONNECTORS:
+        idx = lower.find(delim)
+        if idx >= 0:
+            sentence = sentence[:idx]
+            lower = sentence.lower()
+    sentence = _LEADING_ARTICLE_RE.sub("", sentence)
+    sentence = sentence.strip(" ,;:.!?")
+    if len(sentence) > 80:
+        sentence = sentence[:80].rsplit(" ", 1)[0]
+    if not sentence:
+        return ""
+    # Add a little context if the lead sentence is too short/vague
+    if len(sentence.split()) < 4 and len(sentences) > 1:
+        extra = sentences[1].strip(" ,;:.!?")
+        if extra and len(extra.split()) >= 3:
+            sentence = f"{sentence}: {extra}"
+    sentence = sentence.strip()
+    if len(sentence) > 90:
+        sentence = sentence[:90].rsplit(" ", 1)[0]
+    return sentence[:1].upper() + sentence[1:]
+
+
+def _make_reason_from_text(text: str) -> str:
+    sentences = _extract_sentences(text)
+    if not sentences:
+        return ""
+    reason = sentences[0].strip()
+    # Build a medium-length reason (1–2 sentences, ~90–160 chars)
+    if len(reason) < 60 and len(sentences) > 1:
+        second = sentences[1].strip()
+        if second:
+            reason = f"{reason}. {second}"
+    reason = reason.strip()
+    if len(reason) < 90 and len(sentences) > 2:
+        third = sentences[2].strip()
+        if third:
+            reason = f"{reason}. {third}"
+    # Trim to a reasonable length while keeping sentences
+    if len(reason) > 180:
+        reason = reason[:180].rsplit(" ", 1)[0]
+    if not reason.endswith("."):
+        reason += "."
+    return reason
+
+
+def _is_non_english_text(text: str) -> bool:
+    if not text or text.isascii():
+        return False
+    # Detect common non-Latin scripts (Arabic, Urdu, Hindi/Devanagari)
+    if _NON_LATIN_RE.search(text) is not None:
+        return True
+    # Heuristic: if very few ASCII letters, assume non-English
+    letters = sum(1 for c in text if c.isalpha())
+    ascii_letters = sum(1 for c in text if c.isalpha() and ord(c) < 128)
+    if letters > 0 and (ascii_letters / letters) < 0.6:
+        return True
+    return False
+
+
+def _needs_repair(short: ShortClient, repeated_titles: set) -> tuple:
+    """Return (needs_title, needs_reason) for a short's current title/reason."""
+    title_key = (short.title or "").strip().lower()
+    repeated_title = bool(title_key) and title_key in repeated_titles
+    non_english = _is_non_english_text(short.title or "") or _is_non_english_text(short.reason or "")
+    needs_title = not short.title or _is_generic_title(short.title) or repeated_title or non_english
+    needs_reason = not short.reason or _is_generic_reason(short.reason) or non_english
+    return needs_title, needs_reason
+
+
+class _SegmentIndex:
+    """Time-sorted view of transcript segments for window/nearest text lookups."""
+    
+    def __init__(self, segments: List[Dict[str, Any]]):
+        # Segment bounds as arrays so window/nearest lookups are binary searches
+        self.starts = np.fromiter((float(seg.get("start", 0.0)) for seg in segments), dtype=np.float64, count=len(segments))
+        self.ends = np.fromiter((float(seg.get("end", 0.0)) for seg in segments), dtype=np.float64, count=len(segments))
+        self.mids = 0.5 * (self.starts + self.ends)
+        self.texts = [str(seg.get("text", "")).strip() for seg in segments]
+        # Whisper output is time-ordered; fall back to a vectorized scan otherwise
+        self.is_sorted = bool(
+            np.all(self.starts[1:] >= self.starts[:-1]) and np.all(self.ends[1:] >= self.ends[:-1])
+        )
+    
+    def window_text(self, start_time: float, end_time: float) -> str:
+        """Text of all segments overlapping [start_time, end_time], capped at 1400 chars."""
+        texts = self.texts
+        if self.is_sorted:
+            lo = int(np.searchsorted(self.ends, start_time, side="left"))
+            hi = int(np.searchsorted(self.starts, end_time, side="right"))
+            indices = range(lo, hi)
+        else:
+            indices = np.flatnonzero((self.ends >= start_time) & (self.starts <= end_time)).tolist()
+        joined = " ".join(texts[i] for i in indices if texts[i]).strip()
+        return joined[:1400]
+    
+    def nearest_segment_text(self, time_sec: float) -> str:
+        """Text of the segment whose midpoint is closest to time_sec."""
+        mids = self.mids
+        if self.is_sorted:
+            i = int(np.searchsorted(mids, time_sec, side="left"))
+            if i >= len(mids) or (i > 0 and abs(mids[i - 1] - time_sec) <= abs(mids[i] - time_sec)):
+                # First of any segments sharing that midpoint, as a linear scan would pick
+                i = int(np.searchsorted(mids, mids[i - 1], side="left"))
+            return self.texts[i]
+        return self.texts[int(np.argmin(np.abs(mids - time_sec)))]
+
+
 class ShortsAgent:
     """Agent for selecting YouTube shorts from transcripts using LLM"""
     
-    def __init__(self, llm: BaseChatModel):
+    # Number of select_shorts results kept in the per-agent memo
+    CACHE_SIZE = 128
+    # Chunk LLM calls in flight at once in select_shorts_chunked
+    MAX_CONCURRENT_CHUNKS = 4
+    # Local backends that serve requests one at a time (parallel requests
+    # queue against the timeout or multiply the KV cache), so chunks are sent
+    # serially unless a concurrency is given
+    LOCAL_LLMS = frozenset({"ChatOllama"})
+    # Transcript characters packed into one multi-chunk request (~8k tokens)
+    PACKED_PROMPT_CHARS = 24000
+    # Backoff between select_shorts_with_retry attempts (seconds)
+    RETRY_BASE_DELAY = 1.0
+    RETRY_MAX_DELAY = 10.0
+    # Responses shorter than this are not worth an LLM repair round-trip
+    MIN_REPAIR_CHARS = 100
+    # Chat model classes whose with_structured_output is enforced server-side
+    # (JSON schema / tool calls), so the reply needs no cleanup or repair
+    STRUCTURED_OUTPUT_LLMS = frozenset({"ChatOpenAI", "ChatAnthropic"})
+    # Provider SDK errors (matched by class name, so neither SDK is imported)
+    # meaning the request itself was rejected, e.g. the schema is unsupported
+    STRUCTURED_OUTPUT_REJECTIONS = frozenset({"BadRequestError", "UnprocessableEntityError"})
+    
+    def __init__(self, llm: BaseChatModel, cache: Optional[ResponseCache] = None):
         """
         Initialize the shorts agent.
         
         Args:
             llm: Langchain LLM instance
+            cache: Optional persistent cache (any object with get(key) -> bytes
+                and set(key, bytes)) used to reuse selections across runs
         """
         self.llm = llm
+        self.response_cache = cache
         self.output_parser = PydanticOutputParser(pydantic_object=ShortsOutput)
         self.prompt = get_shorts_selection_prompt()
+        self.batch_prompt = get_shorts_batch_selection_prompt()
         self.repair_prompt = get_shorts_repair_prompt()
         self.titles_reasons_prompt = get_titles_reasons_prompt()
+        self._prompt_fingerprint = self._fingerprint_prompts()
+        # Chains are built once and reused by every chunk, retry and repair call
+        self._prompt_caching = RunnableLambda(self._with_prompt_caching)
+        self._llm_chain = self._prompt_caching | llm
+        self._repair_chain = self.repair_prompt | self._llm_chain
+        self._titles_reasons_chain = self.titles_reasons_prompt | self._llm_chain
+        self._structured_llm = self._make_structured_llm(llm)
+        self._cache: "OrderedDict[str, ShortsOutput]" = OrderedDict()
+        # select_shorts runs on worker threads for chunked transcripts
+        self._cache_lock = threading.Lock()
     
     def select_shorts(
         self,
@@ -51,14 +455,29 @@ class ShortsAgent:
         Returns:
             ShortsOutput with selected shorts
         """
-        import re
-        
-        # Format transcript for LLM
+        # Format transcript for LLM (walks the segments once; the text also
+        # keys the caches, so the full result never needs serializing)
         transcript_text = format_transcript_for_llm(transcription_result)
         
         # Format brand context
         brand_context = format_brand_context(brand_info) if brand_info else ""
         
+        # Identical inputs (e.g. reprocessing the same video) skip the LLM entirely
+        cache_key = self._response_cache_key(transcript_text, brand_context, target_shorts, min_gap_seconds)
+        with self._cache_lock:
+            cached_result = self._cache.get(cache_key)
+            if cached_result is not None:
+                self._cache.move_to_end(cache_key)
+        if cached_result is not None:
+            return cached_result.model_copy(deep=True)
+        
+        # Persistent cache: the same transcript and settings on a previous run
+        if self.response_cache is not None:
+            cached = self._response_cache_get(cache_key)
+            if cached is not None:
+                self._remember(cache_key, cached)
+                return cached
+        
         # Format the prompt
         formatted_prompt = self.prompt.format_messages(
             transcript=transcript_text,
@@ -67,26 +486,121 @@ class ShortsAgent:
             min_gap_seconds=round(min_gap_seconds, 2)
         )
         
-        # Invoke LLM
-        response = self.llm.invoke(formatted_prompt)
-        content = response.content if hasattr(response, 'content') else str(response)
-        
-        # Clean up response - remove thinking tags and markdown
-        # Remove <think>...</think> tags (DeepSeek R1 style)
-        content = re.sub(r'<think>.*?</think>', '', content, flags=re.DOTALL)
+        # Providers with native structured output return schema-valid shorts
+        output = self._invoke_structured(formatted_prompt)
+        if output is None:
+            output = self._stream_and_parse(formatted_prompt)
+
+        result = self._finalize_selection(output, transcription_result, target_shorts, min_gap_seconds)
+        self._remember(cache_key, result)
+        if self.response_cache is not None and result.shorts:
+            try:
+                self.response_cache.set(cache_key, result.model_dump_json().encode("utf-8"))
+            except Exception as e:
+                print(f"Warning: Could not write LLM response cache: {e}")
+        return result
+    
+    def _make_structured_llm(self, llm: BaseChatModel) -> Optional[Any]:
+        """
+        Bind ShortsOutput as the response schema when the provider enforces it.
         
-        # Remove markdown code blocks
-        content = re.sub(r'```json\s*', '', content)
-        content = re.sub(r'```\s*', '', content)
-        content = content.strip()
+        Args:
+            llm: Langchain LLM instance
+            
+        Returns:
+            Runnable returning ShortsOutput, or None to use the streaming parser
+        """
+        if type(llm).__name__ not in self.STRUCTURED_OUTPUT_LLMS:
+            return None
+        try:
+            return self._prompt_caching | llm.with_structured_output(ShortsOutput)
+        except Exception as e:
+            print(f"Warning: Structured output unavailable ({e}), parsing raw responses")
+            return None
+    
+    def _invoke_structured(self, messages: List[Any]) -> Optional[ShortsOutput]:
+        """
+        Request shorts through the provider's structured-output mode.
         
-        # Clean specific DeepSeek artifacts
-        content = self._clean_json_content(content)
+        Args:
+            messages: Formatted prompt messages
+            
+        Returns:
+            ShortsOutput, or None when unsupported or the response was unusable
+            
+        Raises:
+            Transient provider errors (timeouts, rate limits, connection
+            resets), so select_shorts_with_retry's backoff handles them
+        """
+        if self._structured_llm is None:
+            return None
+        try:
+            response = self._structured_llm.invoke(messages)
+        except Exception as e:
+            if not self._is_structured_output_rejection(e):
+                raise
+            # The model/endpoint rejects the schema; don't retry it every call
+            print(f"Warning: Structured output failed ({e}), falling back to JSON parsing")
+            self._structured_llm = None
+            return None
+        if response is None:
+            return None
+        data = response.model_dump() if hasattr(response, "model_dump") else response
+        if not isinstance(data, dict):
+            return None
         try:
-            output = self._parse_shorts_output(content)
+            return self._build_shorts_output(self._patch_shorts_data(data)["shorts"])
         except Exception:
-            output = self._repair_and_parse(content)
-
+            return None
+    
+    def _is_structured_output_rejection(self, error: Exception) -> bool:
+        """True if a structured-output call failed because the feature/schema is unsupported."""
+        if isinstance(error, (NotImplementedError, ValueError)):
+            return True
+        return any(cls.__name__ in self.STRUCTURED_OUTPUT_REJECTIONS for cls in type(error).__mro__)
+    
+    def _stream_and_parse(self, messages: List[Any]) -> ShortsOutput:
+        """
+        Stream a free-form JSON reply and parse it, repairing via the LLM if needed.
+        
+        Args:
+            messages: Formatted prompt messages
+            
+        Returns:
+            Parsed ShortsOutput (possibly empty)
+        """
+        # Stream LLM response, stopping once the JSON object is complete
+        streamed_items: List[Dict[str, Any]] = []
+        content = self._stream_json_response(messages, streamed_items)
+        
+        # Clean up response - remove thinking tags and markdown code blocks
+        content = _RESPONSE_NOISE_RE.sub('', content).strip()
+        
+        # Clean specific DeepSeek artifacts
+        cleaned = self._clean_json_content(content)
+        output = self._try_local_parse(cleaned, content)
+        if (output is None or not output.shorts) and streamed_items:
+            # Shorts decoded while streaming survive a truncated/broken wrapper
+            try:
+                output = self._build_shorts_output(self._patch_shorts_data({"shorts": streamed_items})["shorts"])
+            except Exception:
+                pass
+        # Only pay for an LLM repair round-trip when nothing was recoverable locally
+        if output is None or not output.shorts:
+            if len(cleaned) > self.MIN_REPAIR_CHARS:
+                output = self._repair_and_parse(cleaned)
+            elif output is None:
+                output = ShortsOutput(shorts=[], total_shorts=0)
+        return output
+    
+    def _finalize_selection(
+        self,
+        output: ShortsOutput,
+        transcription_result: Dict[str, Any],
+        target_shorts: int,
+        min_gap_seconds: float
+    ) -> ShortsOutput:
+        """Rank, spread, refine and enrich parsed LLM shorts for one transcript."""
         ranked = []
         if output.shorts:
             ranked = self._rank_and_spread(
@@ -105,110 +619,280 @@ class ShortsAgent:
         )
         return self._enrich_shorts(refined, transcription_result)
 
-    def _clean_json_content(self, content: str) -> str:
-        """Clean common LLM JSON errors"""
-        import re
+    def _pack_chunks(self, chunks: List[Dict[str, Any]]) -> List[List[int]]:
+        """Group chunk indices so each group's transcripts fit in PACKED_PROMPT_CHARS."""
+        groups: List[List[int]] = []
+        current: List[int] = []
+        size = 0
+        for idx, chunk in enumerate(chunks):
+            chunk_size = len(chunk.get("text", "")) + 40 * len(chunk.get("segments", []))
+            if current and size + chunk_size > self.PACKED_PROMPT_CHARS:
+                groups.append(current)
+                current = []
+                size = 0
+            current.append(idx)
+            size += chunk_size
+        if current:
+            groups.append(current)
+        return groups
+
+    def _select_shorts_packed(
+        self,
+        chunks: List[Dict[str, Any]],
+        brand_info: Optional[Dict[str, Any]],
+        target_shorts: int,
+        min_gap_seconds: float
+    ) -> List[ShortsOutput]:
+        """
+        Select shorts for several chunks with a single LLM request.
+        
+        The chunks are sent as numbered sections and the model returns one
+        shorts list per chunk, so the system prompt is paid once per group.
+        Falls back to one select_shorts call per chunk if the combined
+        response can't be parsed, and for any chunk whose shorts fail
+        validation.
+        """
+        if len(chunks) > 1:
+            sections = "\n\n".join(
+                f"### CHUNK {i}\n{format_transcript_for_llm(chunk)}" for i, chunk in enumerate(chunks)
+            )
+            formatted_prompt = self.batch_prompt.format_messages(
+                chunk_count=len(chunks),
+                chunks=sections,
+                brand_context=format_brand_context(brand_info) if brand_info else "",
+                target_shorts=target_shorts,
+                min_gap_seconds=round(min_gap_seconds, 2)
+            )
+            try:
+                content = self._stream_json_response(formatted_prompt)
+                routed = self._parse_packed_output(content, chunks)
+            except Exception as e:
+                print(f"Warning: Packed LLM request failed ({e}); selecting chunks one by one")
+                routed = None
+            if routed is not None:
+                results = []
+                for i, (chunk, items) in enumerate(zip(chunks, routed)):
+                    try:
+                        output = self._build_shorts_output(self._patch_shorts_data({"shorts": items})["shorts"])
+                    except Exception as e:
+                        # One malformed short must not cost the other chunks in the group
+                        print(f"Warning: Packed shorts for chunk {i} are invalid ({e}); selecting it alone")
+                        results.append(self.select_shorts(
+                            chunk, brand_info, target_shorts=target_shorts, min_gap_seconds=min_gap_seconds
+                        ))
+                        continue
+                    results.append(self._finalize_selection(output, chunk, target_shorts, min_gap_seconds))
+                return results
+        return [
+            self.select_shorts(chunk, brand_info, target_shorts=target_shorts, min_gap_seconds=min_gap_seconds)
+            for chunk in chunks
+        ]
+
+    def _parse_packed_output(self, content: str, chunks: List[Dict[str, Any]]) -> Optional[List[List[Any]]]:
+        """Split a packed response into per-chunk raw short lists, or None if unparseable."""
+        content = _RESPONSE_NOISE_RE.sub('', content).strip()
+        span = _find_json_object(content, key="results")
+        if span is None:
+            return None
+        try:
+            data = json_loads(self._repair_json_text(content[span[0]:span[1]]))
+        except json.JSONDecodeError:
+            return None
+        results = data.get("results") if isinstance(data, dict) else None
+        if not isinstance(results, list):
+            return None
 
-        # Strip common prefixes/suffixes outside JSON
-        json_start = content.find('{')
-        json_end = content.rfind('}') + 1
-        if json_start >= 0 and json_end > json_start:
-            content = content[json_start:json_end]
-
-        # Remove JS-style comments
-        content = re.sub(r'//.*', '', content)
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)
-
-        # Fix invalid timecodes on start/end times (e.g., 10.56.39.32 or 00:10:56.39)
-        def _fix_timecode(match: re.Match) -> str:
-            key = match.group(1)
-            raw = match.group(2)
-            seconds = self._parse_time_value(raw)
-            if seconds is None:
-                return match.group(0)
-            return f"\"{key}\": {seconds}"
+        # Chunk windows route shorts whose chunk_index is missing or wrong
+        bounds = []
+        for chunk in chunks:
+            segs = chunk.get("segments", [])
+            bounds.append((
+                float(segs[0].get("start", 0.0)) if segs else 0.0,
+                float(segs[-1].get("end", 0.0)) if segs else 0.0,
+            ))
 
-        content = re.sub(
-            r'"((?:start|end)_time)"\s*:\s*([0-9]+(?:[.:][0-9]+){2,3})',
-            _fix_timecode,
-            content
-        )
+        routed: List[List[Any]] = [[] for _ in chunks]
+        for entry in results:
+            if not isinstance(entry, dict) or not isinstance(entry.get("shorts"), list):
+                continue
+            try:
+                idx = int(entry.get("chunk_index"))
+            except (TypeError, ValueError):
+                idx = -1
+            for item in entry["shorts"]:
+                target = idx
+                start = self._parse_time_value(item.get("start_time")) if isinstance(item, dict) else None
+                if start is not None and not (
+                    0 <= target < len(chunks) and bounds[target][0] <= start <= bounds[target][1]
+                ):
+                    target = next((i for i, (lo, hi) in enumerate(bounds) if lo <= start <= hi), target)
+                if 0 <= target < len(chunks):
+                    routed[target].append(item)
+        return routed
+
+    def _remember(self, cache_key: str, result: ShortsOutput) -> None:
+        """Store a result in the in-memory LRU memo."""
+        result = result.model_copy(deep=True)
+        with self._cache_lock:
+            self._cache[cache_key] = result
+            while len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def _fingerprint_prompts(self) -> str:
+        """Hash the prompt templates and output schema so edits invalidate cached selections."""
+        parts = [self.output_parser.get_format_instructions()]
+        for prompt in (self.prompt, self.batch_prompt, self.repair_prompt, self.titles_reasons_prompt):
+            for message in prompt.messages:
+                template = getattr(getattr(message, "prompt", None), "template", None)
+                parts.append(template if template is not None else repr(message))
+        return hashlib.sha256("\x00".join(parts).encode("utf-8")).hexdigest()
+
+    def _response_cache_key(
+        self,
+        transcript_text: str,
+        brand_context: str,
+        target_shorts: int,
+        min_gap_seconds: float
+    ) -> str:
+        """Key for the result caches; includes the model and prompts so neither shares stale entries."""
+        model = getattr(self.llm, "model_name", None) or getattr(self.llm, "model", None) or ""
+        payload = "\x00".join([
+            self._prompt_fingerprint,
+            type(self.llm).__name__,
+            str(model),
+            transcript_text,
+            brand_context,
+            str(target_shorts),
+            f"{min_gap_seconds:.2f}",
+        ])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _response_cache_get(self, key: str) -> Optional[ShortsOutput]:
+        """Load a cached selection, treating unreadable entries as misses."""
+        try:
+            cached = self.response_cache.get(key)
+            if cached is None:
+                return None
+            return ShortsOutput.model_validate_json(cached)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable LLM response cache entry: {e}")
+            return None
 
-        # Fix timestamps with units (e.g., "10.5s" -> 10.5)
-        # Look for "start_time": "10.5s" or "start_time": "10.5"
-        content = re.sub(
-            r'"((?:start|end)_time)"\s*:\s*"([\d\.]+)(?:s|sec|secs)?"',
-            r'"\1": \2',
-            content
-        )
+    def _with_prompt_caching(self, messages: Any) -> List[Any]:
+        """
+        Mark the static system prompt as cacheable for Anthropic models.
+        
+        OpenAI caches long identical prefixes automatically; Anthropic needs an
+        explicit cache_control block. Other providers get the messages unchanged.
+        Accepts a message list or the prompt value a chained template emits.
+        """
+        if hasattr(messages, "to_messages"):
+            messages = messages.to_messages()
+        if type(self.llm).__name__ != "ChatAnthropic" or not messages:
+            return messages
+        first = messages[0]
+        if not isinstance(first, SystemMessage) or not isinstance(first.content, str):
+            return messages
+        cached_system = SystemMessage(content=[
+            {"type": "text", "text": first.content, "cache_control": {"type": "ephemeral"}}
+        ])
+        return [cached_system, *messages[1:]]
+
+    def _stream_json_response(self, messages: List[Any], items: Optional[List[Dict[str, Any]]] = None) -> str:
+        """
+        Stream the LLM response and return the accumulated text.
+        
+        Stops reading as soon as the top-level shorts object closes, so any
+        trailing commentary the model emits after the JSON isn't waited on.
+        
+        Args:
+            messages: Formatted prompt messages
+            items: Optional list that receives each short object decoded while
+                streaming; if the stream fails after some arrived, the partial
+                text is returned instead of raising
+        """
+        scanner = _JsonObjectScanner()
+        parts: List[str] = []
+        try:
+            for chunk in self._llm_chain.stream(messages):
+                text = chunk.content if hasattr(chunk, "content") else str(chunk)
+                if not isinstance(text, str):
+                    text = str(text)
+                parts.append(text)
+                if scanner.feed(text):
+                    break
+        except Exception as e:
+            if items is None or not scanner.items:
+                raise
+            print(f"Warning: LLM stream interrupted ({e}); keeping {len(scanner.items)} streamed shorts")
+        if items is not None:
+            items.extend(scanner.items)
+        return "".join(parts)
 
-        # Fix missing commas between objects in array
-        content = re.sub(r'}\s*{', '}, {', content)
+    def _clean_json_content(self, content: str) -> str:
+        """Clean common LLM JSON errors"""
 
-        # Fix trailing commas in arrays/objects
-        content = re.sub(r',\s*([\]}])', r'\1', content)
+        # Strip common prefixes/suffixes outside JSON
+        span = _find_json_object(content, key="shorts")
+        if span is not None:
+            content = content[span[0]:span[1]]
+        else:
+            # Unbalanced (e.g. truncated) output: keep the outermost brace range
+            json_start = content.find('{')
+            json_end = content.rfind('}') + 1
+            if json_start >= 0 and json_end > json_start:
+                content = content[json_start:json_end]
+
+        return self._repair_json_text(content)
+
+    def _repair_json_text(self, content: str) -> str:
+        """Fix comments, start/end time formats and missing/trailing commas in one regex pass."""
+        def _fix(match: re.Match) -> str:
+            kind = match.lastgroup
+            if kind == "timecode":
+                seconds = self._parse_time_value(match.group("tc_val"))
+                if seconds is None:
+                    return match.group(0)
+                return f"\"{match.group('tc_key')}\": {seconds}"
+            if kind == "unit":
+                return f"\"{match.group('unit_key')}\": {match.group('unit_val')}"
+            if kind == "string":
+                return match.group(0)
+            if kind == "missing_comma":
+                return "}, {"
+            # comment / trailing_comma
+            return ""
 
-        return content
+        return _CLEAN_RE.sub(_fix, content)
 
     def _parse_shorts_output(self, content: str) -> ShortsOutput:
         """Parse cleaned LLM response into ShortsOutput."""
-        import re
 
         # Try multiple JSON extraction strategies
         json_data = None
 
-        # Strategy 1: Look for JSON with "shorts" array
-        match = re.search(r'\{[^{}]*"shorts"\s*:\s*\[.*?\][^{}]*\}', content, re.DOTALL)
-        if match:
-            try:
-                json_data = json.loads(match.group())
-            except json.JSONDecodeError:
-                pass
-
-        # Strategy 2: Find outermost braces
-        if json_data is None:
-            json_start = content.find('{')
-            json_end = content.rfind('}') + 1
-            if json_start >= 0 and json_end > json_start:
-                try:
-                    json_data = json.loads(content[json_start:json_end])
-                except json.JSONDecodeError:
-                    pass
-
-        # Strategy 3: Build minimal valid JSON from regex captures
-        if json_data is None:
-            # Try to extract individual shorts
-            shorts_match = re.search(r'"shorts"\s*:\s*(\[.*?\])', content, re.DOTALL)
-            total_match = re.search(r'"total_shorts"\s*:\s*(\d+)', content)
-
-            if shorts_match:
-                try:
-                    shorts_array = json.loads(shorts_match.group(1))
-                    total = int(total_match.group(1)) if total_match else len(shorts_array)
-                    json_data = {"shorts": shorts_array, "total_shorts": total}
-                except (json.JSONDecodeError, ValueError):
-                    pass
-
-        # Strategy 4: If content is a raw array of shorts, wrap it
+        # Strategy 1: The whole cleaned response is valid JSON
+        try:
+            parsed = json_loads(content)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict):
+            json_data = parsed
+        elif isinstance(parsed, list):
+            # A raw array of shorts, wrap it
+            json_data = {"shorts": parsed, "total_shorts": len(parsed)}
+
+        # Strategy 2: Walk the response decoding every complete object, in one
+        # pass. Prefer an object with a "shorts" key; otherwise gather complete
+        # short objects left over from a truncated/broken wrapper.
         if json_data is None:
-            stripped = content.strip()
-            if stripped.startswith('[') and stripped.endswith(']'):
-                try:
-                    shorts_array = json.loads(stripped)
-                    json_data = {"shorts": shorts_array, "total_shorts": len(shorts_array)}
-                except json.JSONDecodeError:
-                    pass
+            json_data = self._scan_json_objects(content)
 
-        # Strategy 5: Regex salvage for start/end pairs
+        # Strategy 3: Last-resort regex salvage for start/end pairs inside
+        # objects too malformed to decode
         if json_data is None:
             shorts = []
-            pattern = re.compile(
-                r'"title"\s*:\s*"(?P<title>[^"]+)"[^{}]*?'
-                r'"start_time"\s*:\s*(?P<start>[0-9:.]+)[^{}]*?'
-                r'"end_time"\s*:\s*(?P<end>[0-9:.]+)',
-                re.DOTALL
-            )
-            for m in pattern.finditer(content):
+            for m in _SHORTS_SALVAGE_RE.finditer(content):
                 start_val = self._parse_time_value(m.group("start"))
                 end_val = self._parse_time_value(m.group("end"))
                 if start_val is None or end_val is None or end_val <= start_val:
@@ -231,13 +915,74 @@ class ShortsAgent:
             json_data = {"shorts": [], "total_shorts": 0}
         json_data = self._patch_shorts_data(json_data)
 
-        return ShortsOutput(**json_data)
+        return self._build_shorts_output(json_data["shorts"])
+
+    def _build_shorts_output(self, shorts: List[Dict[str, Any]]) -> ShortsOutput:
+        """
+        Build ShortsOutput from patched short dicts.
+        
+        _patch_shorts_data already normalized times and score, so shorts whose
+        fields are all known and whose text fields are strings skip pydantic
+        validation; anything else goes through the validating constructor.
+        """
+        fields = ShortClient.model_fields
+        built: List[ShortClient] = []
+        for short in shorts:
+            if (
+                short.keys() <= fields.keys()
+                and isinstance(short["title"], str)
+                and isinstance(short["reason"], str)
+            ):
+                built.append(ShortClient.model_construct(**short))
+            else:
+                built.append(ShortClient(**short))
+        return ShortsOutput.model_construct(shorts=built, total_shorts=len(built))
+
+    @staticmethod
+    def _scan_json_objects(content: str) -> Optional[Dict[str, Any]]:
+        """Decode complete JSON objects embedded in free text, left to right."""
+        decoder = json.JSONDecoder()
+        first = None
+        short_items: List[Dict[str, Any]] = []
+        idx = content.find('{')
+        while idx >= 0:
+            try:
+                obj, end = decoder.raw_decode(content, idx)
+            except json.JSONDecodeError:
+                # Step inside the broken object so nested shorts are still found
+                idx = content.find('{', idx + 1)
+                continue
+            if isinstance(obj, dict):
+                if "shorts" in obj:
+                    return obj
+                if first is None:
+                    first = obj
+                if "start_time" in obj and "end_time" in obj:
+                    short_items.append(obj)
+            idx = content.find('{', end)
+
+        if short_items:
+            return {"shorts": short_items, "total_shorts": len(short_items)}
+        return first
+
+    def _try_local_parse(self, *candidates: str) -> Optional[ShortsOutput]:
+        """Parse the first candidate text that yields shorts, without calling the LLM."""
+        fallback = None
+        for candidate in candidates:
+            try:
+                output = self._parse_shorts_output(candidate)
+            except Exception:
+                continue
+            if output.shorts:
+                return output
+            if fallback is None:
+                fallback = output
+        return fallback
 
     def _repair_and_parse(self, content: str) -> ShortsOutput:
         """Attempt to repair malformed output via LLM, then parse."""
         try:
-            formatted = self.repair_prompt.format_messages(content=content)
-            response = self.llm.invoke(formatted)
+            response = self._repair_chain.invoke({"content": content})
             repaired = response.content if hasattr(response, "content") else str(response)
             repaired = repaired.strip()
             repaired = self._clean_json_content(repaired)
@@ -267,38 +1012,28 @@ class ShortsAgent:
             short = self._coerce_short_item(short)
             if not isinstance(short, dict):
                 continue
+            # Timestamps are required; skip shorts with missing/invalid times
+            start_val = self._parse_time_value(short.get("start_time"))
+            if start_val is None:
+                continue
+            end_val = self._parse_time_value(short.get("end_time"))
+            if end_val is None:
+                continue
+            short["start_time"] = start_val
+            short["end_time"] = end_val
+
             # Ensure required text fields
-            if "title" not in short:
-                short["title"] = "Untitled Segment"
-            if "reason" not in short:
-                short["reason"] = "Strong standalone moment"
-                
-            # Ensure timestamps are valid floats
-            try:
-                # Handle start_time
-                if "start_time" not in short:
-                    continue
-                start_val = self._parse_time_value(short["start_time"])
-                if start_val is None:
-                    continue
-                short["start_time"] = float(start_val)
-                    
-                # Handle end_time
-                if "end_time" not in short:
-                    continue
-                end_val = self._parse_time_value(short["end_time"])
-                if end_val is None:
-                    continue
-                short["end_time"] = float(end_val)
-                    
-            except (ValueError, TypeError):
-                continue # Skip shorts with invalid time formats
+            short.setdefault("title", "Untitled Segment")
+            short.setdefault("reason", "Strong standalone moment")
 
             # Ensure numeric score
-            try:
-                short["score"] = int(float(short.get("score", 0)))
-            except (ValueError, TypeError):
-                short["score"] = 0
+            score = short.get("score", 0)
+            if type(score) is not int:
+                try:
+                    score = int(float(score))
+                except (ValueError, TypeError):
+                    score = 0
+            short["score"] = score
 
             patched_shorts.append(short)
             
@@ -326,53 +1061,13 @@ class ShortsAgent:
 
     def _parse_time_value(self, value: Any) -> Optional[float]:
         """Parse time values in seconds or timecode-like strings into seconds."""
-        import re
 
         if isinstance(value, (int, float)):
             return float(value)
         if not isinstance(value, str):
             return None
 
-        raw = value.strip().lower().replace("sec", "").replace("secs", "").replace("s", "")
-        raw = raw.strip()
-        if raw == "":
-            return None
-
-        # If it looks like a plain float, parse directly
-        if re.fullmatch(r"\d+(\.\d+)?", raw):
-            try:
-                return float(raw)
-            except ValueError:
-                return None
-
-        # Timecode patterns: HH:MM:SS(.ms) or MM:SS(.ms) or dot-separated
-        if ":" in raw:
-            parts = raw.split(":")
-        elif raw.count(".") >= 2:
-            parts = raw.split(".")
-        else:
-            return None
-
-        try:
-            if len(parts) == 2:
-                minutes = int(parts[0])
-                seconds = float(parts[1])
-                return minutes * 60 + seconds
-            if len(parts) == 3:
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds = float(parts[2])
-                return hours * 3600 + minutes * 60 + seconds
-            if len(parts) == 4:
-                hours = int(parts[0])
-                minutes = int(parts[1])
-                seconds = int(parts[2])
-                millis = int(parts[3])
-                return hours * 3600 + minutes * 60 + seconds + (millis / 100.0)
-        except ValueError:
-            return None
-
-        return None
+        return _parse_time_string(value)
 
     def _enrich_shorts(self, output: ShortsOutput, transcription_result: Dict[str, Any]) -> ShortsOutput:
         """Fill missing titles/reasons using nearby transcript context."""
@@ -382,158 +1077,27 @@ class ShortsAgent:
         language = str(transcription_result.get("language", "") or "").lower()
         force_english = language not in {"en", "english"}
 
-        def window_text(start_time: float, end_time: float) -> str:
-            parts = []
-            for seg in segments:
-                s = float(seg.get("start", 0.0))
-                e = float(seg.get("end", 0.0))
-                if e < start_time or s > end_time:
-                    continue
-                text = str(seg.get("text", "")).strip()
-                if text:
-                    parts.append(text)
-            joined = " ".join(parts).strip()
-            return joined[:1400]
-
-        def nearest_segment_text(time_sec: float) -> str:
-            best = None
-            best_dist = None
-            for seg in segments:
-                s = float(seg.get("start", 0.0))
-                e = float(seg.get("end", 0.0))
-                mid = (s + e) / 2.0
-                dist = abs(mid - time_sec)
-                if best_dist is None or dist < best_dist:
-                    best_dist = dist
-                    best = seg
-            if not best:
-                return ""
-            return str(best.get("text", "")).strip()
-
-        def is_generic_reason(reason: str) -> bool:
-            r = reason.strip().lower()
-            if r in {"", "n/a"}:
-                return True
-            if len(r.split()) < 5:
-                return True
-            if r.startswith("auto-generated"):
-                return True
-            return False
-        
-        def is_generic_title(title: str) -> bool:
-            t = title.strip().lower()
-            bad_titles = {
-                "compelling title",
-                "end time",
-                "full transcript",
-                "key supporting clip",
-                "the core message",
-                "longer clips from different sections",
-                "the aerial",
-                "the end of the first day",
-                "a character from a charles dickens novel",
-                "untitled segment",
-                "untitled",
-                "auto clip",
-            }
-            if t in bad_titles:
-                return True
-            if t.startswith(("like ", "because ", "so ", "then ", "yeah ")):
-                return True
-            if len(t.split()) <= 2 and t in {"clip", "segment", "highlight"}:
-                return True
-            return False
-
-        def extract_sentences(text: str) -> list[str]:
-            import re
-
-            cleaned = re.sub(r"\s+", " ", text.replace("\n", " ")).strip()
-            if not cleaned:
-                return []
-            sentences = re.split(r'(?<=[.!?])\s+', cleaned)
-            return [s.strip(" \t\n.?!") for s in sentences if s.strip(" \t\n.?!")]
-
-        def make_title_from_text(text: str) -> str:
-            sentences = extract_sentences(text)
-            if not sentences:
-                return ""
-            sentence = sentences[0]
-            lower = sentence.lower()
-            for delim in (" because ", " that ", " which ", " so ", " but ", " and ", " if ", " when ", " after "):
-                idx = lower.find(delim)
-                if idx >= 0:
-                    sentence = sentence[:idx]
-                    lower = sentence.lower()
-            sentence = re.sub(r'^(the|a|an|this|that|these|those|it|they|we|i|he|she)\s+', "", sentence, flags=re.IGNORECASE)
-            sentence = sentence.strip(" ,;:.!?")
-            if len(sentence) > 80:
-                sentence = sentence[:80].rsplit(" ", 1)[0]
-            if not sentence:
-                return ""
-            # Add a little context if the lead sentence is too short/vague
-            if len(sentence.split()) < 4 and len(sentences) > 1:
-                extra = sentences[1].strip(" ,;:.!?")
-                if extra and len(extra.split()) >= 3:
-                    sentence = f"{sentence}: {extra}"
-            sentence = sentence.strip()
-            if len(sentence) > 90:
-                sentence = sentence[:90].rsplit(" ", 1)[0]
-            return sentence[0].upper() + sentence[1:]
-
-        def make_reason_from_text(text: str) -> str:
-            sentences = extract_sentences(text)
-            if not sentences:
-                return ""
-            reason = sentences[0].strip()
-            # Build a medium-length reason (1–2 sentences, ~90–160 chars)
-            if len(reason) < 60 and len(sentences) > 1:
-                second = sentences[1].strip()
-                if second:
-                    reason = f"{reason}. {second}"
-            reason = reason.strip()
-            if len(reason) < 90 and len(sentences) > 2:
-                third = sentences[2].strip()
-                if third:
-                    reason = f"{reason}. {third}"
-            # Trim to a reasonable length while keeping sentences
-            if len(reason) > 180:
-                reason = reason[:180].rsplit(" ", 1)[0]
-            if not reason.endswith("."):
-                reason += "."
-            return reason
-
-        def is_non_english_text(text: str) -> bool:
-            if not text:
-                return False
-            # Detect common non-Latin scripts (Arabic, Urdu, Hindi/Devanagari)
-            for ch in text:
-                code = ord(ch)
-                if 0x0600 <= code <= 0x06FF or 0x0750 <= code <= 0x077F or 0x08A0 <= code <= 0x08FF:
-                    return True
-                if 0x0900 <= code <= 0x097F:
-                    return True
-            # Heuristic: if very few ASCII letters, assume non-English
-            letters = sum(1 for c in text if c.isalpha())
-            ascii_letters = sum(1 for c in text if c.isalpha() and ord(c) < 128)
-            if letters > 0 and (ascii_letters / letters) < 0.6:
-                return True
-            return False
+        index = _SegmentIndex(segments)
 
         # Detect repeated titles and treat them as generic
-        title_counts: Dict[str, int] = {}
+        seen_titles = set()
+        repeated_titles = set()
         for s in output.shorts:
             t = (s.title or "").strip().lower()
-            if t:
-                title_counts[t] = title_counts.get(t, 0) + 1
-
+            if t in seen_titles:
+                repeated_titles.add(t)
+            else:
+                seen_titles.add(t)
+
+        # Only clips with a weak title/reason need transcript context; clip
+        # times are not changed by the LLM repair, so excerpts are reused below
+        excerpts: Dict[int, str] = {}
         repair_targets: List[Dict[str, Any]] = []
         for idx, short in enumerate(output.shorts):
-            text = window_text(short.start_time, short.end_time) or nearest_segment_text(short.start_time)
-            title_key = (short.title or "").strip().lower()
-            repeated_title = title_key and title_counts.get(title_key, 0) > 1
-            needs_title = not short.title or is_generic_title(short.title) or repeated_title
-            needs_reason = not short.reason or is_generic_reason(short.reason)
-            non_english = is_non_english_text(short.title or "") or is_non_english_text(short.reason or "")
+            if not any(_needs_repair(short, repeated_titles)):
+                continue
+            text = index.window_text(short.start_time, short.end_time) or index.nearest_segment_text(short.start_time)
+            excerpts[idx] = text
             if text:
                 repair_targets.append({
                     "index": idx,
@@ -547,20 +1111,20 @@ class ShortsAgent:
 
         enriched: List[ShortClient] = []
         for idx, short in enumerate(output.shorts):
-            text = window_text(short.start_time, short.end_time) or nearest_segment_text(short.start_time)
-            title_key = (short.title or "").strip().lower()
-            repeated_title = title_key and title_counts.get(title_key, 0) > 1
-            non_english = is_non_english_text(short.title or "") or is_non_english_text(short.reason or "")
-            if not short.title or is_generic_title(short.title) or repeated_title or non_english:
-                if text:
-                    short.title = make_title_from_text(text)
-                if not short.title:
-                    short.title = f"Clip {idx + 1}"
-            if not short.reason or is_generic_reason(short.reason) or non_english:
-                if text:
-                    short.reason = make_reason_from_text(text)
-                if not short.reason:
-                    short.reason = "Highlights a clear, self-contained point from the segment."
+            if idx in excerpts:
+                # Re-check after the LLM repair; fall back to transcript heuristics
+                text = excerpts[idx]
+                needs_title, needs_reason = _needs_repair(short, repeated_titles)
+                if needs_title:
+                    if text:
+                        short.title = _make_title_from_text(text)
+                    if not short.title:
+                        short.title = f"Clip {idx + 1}"
+                if needs_reason:
+                    if text:
+                        short.reason = _make_reason_from_text(text)
+                    if not short.reason:
+                        short.reason = "Highlights a clear, self-contained point from the segment."
             enriched.append(short)
 
         return ShortsOutput(shorts=enriched, total_shorts=len(enriched))
@@ -577,21 +1141,17 @@ class ShortsAgent:
                 )
             items_blob = "\n".join(items_lines).strip()
 
-            formatted = self.titles_reasons_prompt.format_messages(items=items_blob)
-            response = self.llm.invoke(formatted)
+            response = self._titles_reasons_chain.invoke({"items": items_blob})
             content = response.content if hasattr(response, "content") else str(response)
             content = content.strip()
 
-            content = re.sub(r'```json\s*', '', content)
-            content = re.sub(r'```\s*', '', content)
-            content = content.strip()
+            content = _RESPONSE_NOISE_RE.sub('', content).strip()
 
             data = None
-            json_start = content.find("{")
-            json_end = content.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
+            span = _find_json_object(content, key="items")
+            if span is not None:
                 try:
-                    data = json.loads(content[json_start:json_end])
+                    data = json_loads(content[span[0]:span[1]])
                 except json.JSONDecodeError:
                     data = None
 
@@ -600,7 +1160,7 @@ class ShortsAgent:
                 arr_end = content.rfind("]") + 1
                 if arr_start >= 0 and arr_end > arr_start:
                     try:
-                        data = {"items": json.loads(content[arr_start:arr_end])}
+                        data = {"items": json_loads(content[arr_start:arr_end])}
                     except json.JSONDecodeError:
                         data = None
 
@@ -637,31 +1197,44 @@ class ShortsAgent:
         if not candidates:
             return []
 
+        cand_starts = np.fromiter((c.start_time for c in candidates), dtype=np.float64, count=len(candidates))
+        cand_ends = np.fromiter((c.end_time for c in candidates), dtype=np.float64, count=len(candidates))
+        cand_scores = np.fromiter((c.score for c in candidates), dtype=np.float64, count=len(candidates))
+
         if segments:
-            min_time = min(s.get("start", 0) for s in segments)
-            max_time = max(s.get("end", 0) for s in segments)
+            min_time = float(np.fromiter((s.get("start", 0) for s in segments), dtype=np.float64, count=len(segments)).min())
+            max_time = float(np.fromiter((s.get("end", 0) for s in segments), dtype=np.float64, count=len(segments)).max())
         else:
-            min_time = min(c.start_time for c in candidates)
-            max_time = max(c.end_time for c in candidates)
+            min_time = float(cand_starts.min())
+            max_time = float(cand_ends.max())
 
         span = max(1.0, max_time - min_time)
         bucket_size = span / max(1, target_shorts)
 
-        # Keep best per bucket
-        best_per_bucket = {}
-        for c in candidates:
-            mid = (c.start_time + c.end_time) / 2.0
-            bucket = int((mid - min_time) / bucket_size)
-            bucket = max(0, min(target_shorts - 1, bucket))
-            prev = best_per_bucket.get(bucket)
-            if prev is None or c.score > prev.score:
-                best_per_bucket[bucket] = c
-
-        selected = list(best_per_bucket.values())
+        # Keep best per bucket: sort by (bucket, -score) with a stable sort so
+        # the first of equally-scored candidates wins, then take each bucket's head
+        cand_mids = 0.5 * (cand_starts + cand_ends)
+        buckets = np.clip(((cand_mids - min_time) / bucket_size).astype(np.int64), 0, max(0, target_shorts - 1))
+        order = np.lexsort((-cand_scores, buckets))
+        _, heads = np.unique(buckets[order], return_index=True)
+        winners = order[heads]
+        # Preserve the order in which buckets were first seen among candidates
+        _, first_seen = np.unique(buckets, return_index=True)
+        winners = winners[np.argsort(first_seen, kind="stable")]
+
+        selected = [candidates[i] for i in winners.tolist()]
         selected.sort(key=lambda s: s.start_time)
 
-        # Fill remaining slots by score while enforcing spacing
-        remaining = [c for c in candidates if c not in selected]
+        # Fill remaining slots by score while enforcing spacing. Candidates
+        # equal to a selected clip (LLMs often repeat a short verbatim) are
+        # dropped, as list membership did, via a set of field-value keys
+        fields = tuple(ShortClient.model_fields)
+
+        def short_key(c: ShortClient) -> tuple:
+            return tuple(getattr(c, name, None) for name in fields)
+
+        selected_keys = {short_key(c) for c in selected}
+        remaining = [c for c in candidates if short_key(c) not in selected_keys]
         remaining.sort(key=lambda s: s.score, reverse=True)
 
         def too_similar(a: ShortClient, b: ShortClient) -> bool:
@@ -673,29 +1246,54 @@ class ShortsAgent:
             dur = max(0.1, min(a.end_time - a.start_time, b.end_time - b.start_time))
             return (overlap / dur) >= 0.85
 
-        def far_enough(candidate: ShortClient) -> bool:
-            c_mid = (candidate.start_time + candidate.end_time) / 2.0
-            for s in selected:
-                s_mid = (s.start_time + s.end_time) / 2.0
-                if abs(c_mid - s_mid) < min_gap_seconds:
-                    return False
+        # Sorted midpoints of selected clips; only the nearest neighbours of a
+        # candidate can violate the gap
+        selected_mids = sorted((s.start_time + s.end_time) / 2.0 for s in selected)
+
+        def far_enough(c_mid: float) -> bool:
+            i = bisect.bisect_left(selected_mids, c_mid)
+            if i > 0 and abs(c_mid - selected_mids[i - 1]) < min_gap_seconds:
+                return False
+            if i < len(selected_mids) and abs(c_mid - selected_mids[i]) < min_gap_seconds:
+                return False
             return True
 
         for c in remaining:
             if len(selected) >= target_shorts:
                 break
-            if far_enough(c):
+            c_mid = (c.start_time + c.end_time) / 2.0
+            if far_enough(c_mid):
                 selected.append(c)
+                bisect.insort(selected_mids, c_mid)
 
         # Second pass: if still short, allow lower-scored clips even if closer,
         # but avoid near-duplicate windows.
-        if len(selected) < target_shorts:
-            for c in remaining:
+        if len(selected) < target_shorts and remaining:
+            # Check every remaining candidate against the current selection in
+            # one broadcast; only clips added during this pass are checked in Python
+            rem_starts = np.fromiter((c.start_time for c in remaining), dtype=np.float64, count=len(remaining))
+            rem_ends = np.fromiter((c.end_time for c in remaining), dtype=np.float64, count=len(remaining))
+            sel_starts = np.fromiter((s.start_time for s in selected), dtype=np.float64, count=len(selected))
+            sel_ends = np.fromiter((s.end_time for s in selected), dtype=np.float64, count=len(selected))
+            near_dup = (
+                (np.abs(rem_starts[:, None] - sel_starts[None, :]) < 0.5)
+                & (np.abs(rem_ends[:, None] - sel_ends[None, :]) < 0.5)
+            )
+            overlap = np.maximum(
+                0.0,
+                np.minimum(rem_ends[:, None], sel_ends[None, :]) - np.maximum(rem_starts[:, None], sel_starts[None, :])
+            )
+            dur = np.maximum(0.1, np.minimum((rem_ends - rem_starts)[:, None], (sel_ends - sel_starts)[None, :]))
+            similar_to_selected = (near_dup | (overlap / dur >= 0.85)).any(axis=1).tolist()
+
+            added: List[ShortClient] = []
+            for c, similar in zip(remaining, similar_to_selected):
                 if len(selected) >= target_shorts:
                     break
-                if any(too_similar(c, s) for s in selected):
+                if similar or any(too_similar(c, s) for s in added):
                     continue
                 selected.append(c)
+                added.append(c)
 
         selected.sort(key=lambda s: s.start_time)
         return selected[:target_shorts]
@@ -722,41 +1320,42 @@ class ShortsAgent:
         chunk_seconds = chunk_minutes * 60.0
         
         # Find time boundaries
-        min_time = min(s.get("start", 0) for s in segments)
-        max_time = max(s.get("end", 0) for s in segments)
+        starts = np.fromiter((float(s.get("start", 0)) for s in segments), dtype=np.float64, count=len(segments))
+        ends = np.fromiter((float(s.get("end", 0)) for s in segments), dtype=np.float64, count=len(segments))
+        min_time = float(starts.min())
+        max_time = float(ends.max())
         
-        import math
         num_chunks = max(1, math.ceil((max_time - min_time) / chunk_seconds))
         
         if num_chunks <= 1:
             return [transcription_result]
         
+        # Bin every segment by its start time in one pass
+        buckets = np.clip(((starts - min_time) // chunk_seconds).astype(np.int64), 0, num_chunks - 1)
+        chunk_segments_by_bucket: List[List[Dict[str, Any]]] = [[] for _ in range(num_chunks)]
+        for seg, bucket in zip(segments, buckets.tolist()):
+            chunk_segments_by_bucket[bucket].append(seg)
+        
+        include_words = "words" in transcription_result
         chunks = []
-        for i in range(num_chunks):
-            window_start = min_time + i * chunk_seconds
-            window_end = window_start + chunk_seconds
-            
-            # Filter segments that fall within this window
-            chunk_segments = [
-                s for s in segments
-                if s.get("start", 0) >= window_start and s.get("start", 0) < window_end
-            ]
-            
+        for chunk_segments in chunk_segments_by_bucket:
             if not chunk_segments:
                 continue
             
-            chunk_text = " ".join(s.get("text", "") for s in chunk_segments)
+            texts = []
             chunk_words = []
             for s in chunk_segments:
-                chunk_words.extend(s.get("words", []))
+                texts.append(s.get("text", ""))
+                if include_words:
+                    chunk_words.extend(s.get("words", []))
             
             chunk_result = {
-                "text": chunk_text,
+                "text": " ".join(texts),
                 "segments": chunk_segments,
                 "language": transcription_result.get("language", "unknown"),
                 "language_probability": transcription_result.get("language_probability", 0.0),
             }
-            if "words" in transcription_result:
+            if include_words:
                 chunk_result["words"] = chunk_words
             
             chunks.append(chunk_result)
@@ -770,13 +1369,16 @@ class ShortsAgent:
         chunk_minutes: float = 15.0,
         on_progress=None,
         target_shorts: int = 5,
-        min_gap_seconds: float = 90.0
+        min_gap_seconds: float = 90.0,
+        max_concurrency: Optional[int] = None,
+        pack_chunks: bool = False
     ) -> ShortsOutput:
         """
         Select shorts by processing transcript in chunks, then merging results.
         
         This is used for large transcripts that exceed LLM context/memory limits.
-        Each chunk is processed independently, then results are deduplicated.
+        Each chunk is processed independently (concurrently, since the LLM calls
+        are latency-bound), then results are deduplicated.
         
         Args:
             transcription_result: Result from Transcriber or Diarizer
@@ -785,6 +1387,12 @@ class ShortsAgent:
             on_progress: Optional callback(chunk_index, total_chunks)
             target_shorts: Maximum number of shorts to return
             min_gap_seconds: Minimum spacing between clips by midpoint
+            max_concurrency: Chunk LLM calls in flight at once (default
+                MAX_CONCURRENT_CHUNKS, or 1 for LOCAL_LLMS); lower it for
+                rate-limited providers
+            pack_chunks: Send several chunks per LLM request (up to
+                PACKED_PROMPT_CHARS of transcript) to save requests and
+                repeated system-prompt tokens; needs a capable model
             
         Returns:
             ShortsOutput with selected shorts
@@ -803,21 +1411,41 @@ class ShortsAgent:
         all_shorts: List[ShortClient] = []
         per_chunk_target = max(1, min(3, target_shorts))
         
-        for idx, chunk in enumerate(chunks):
+        progress_lock = threading.Lock()
+        started = [0]
+        
+        def run_group(indices: List[int]) -> List[ShortsOutput]:
             if on_progress:
-                on_progress(idx + 1, len(chunks))
-            
-            try:
-                chunk_output = self.select_shorts(
-                    chunk,
-                    brand_info,
-                    target_shorts=per_chunk_target,
-                    min_gap_seconds=min_gap_seconds
-                )
-                all_shorts.extend(chunk_output.shorts)
-            except Exception as e:
-                print(f"  ? LLM chunk {idx + 1}/{len(chunks)} failed: {e}. Skipping...")
-                continue
+                with progress_lock:
+                    for _ in indices:
+                        started[0] += 1
+                        on_progress(started[0], len(chunks))
+            group = [chunks[i] for i in indices]
+            if len(group) > 1:
+                return self._select_shorts_packed(group, brand_info, per_chunk_target, min_gap_seconds)
+            return [self.select_shorts(
+                group[0],
+                brand_info,
+                target_shorts=per_chunk_target,
+                min_gap_seconds=min_gap_seconds
+            )]
+        
+        groups = self._pack_chunks(chunks) if pack_chunks else [[i] for i in range(len(chunks))]
+        if not max_concurrency:
+            local = type(self.llm).__name__ in self.LOCAL_LLMS
+            max_concurrency = 1 if local else self.MAX_CONCURRENT_CHUNKS
+        workers = max(1, min(max_concurrency, len(groups)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_group, indices) for indices in groups]
+            # Collect in chunk order so merging stays deterministic
+            for indices, future in zip(groups, futures):
+                try:
+                    for chunk_output in future.result():
+                        all_shorts.extend(chunk_output.shorts)
+                except Exception as e:
+                    label = ", ".join(str(i + 1) for i in indices)
+                    print(f"  ? LLM chunk {label}/{len(chunks)} failed: {e}. Skipping...")
+                    continue
         
         if not all_shorts:
             refined = refine_shorts_output(
@@ -830,20 +1458,33 @@ class ShortsAgent:
             )
             return self._enrich_shorts(refined, transcription_result)
         
-        # Deduplicate: remove shorts that overlap significantly
+        # Deduplicate: remove shorts that overlap significantly with any kept
+        # short (not just the previous one, which misses chunk-boundary clips)
         all_shorts.sort(key=lambda s: s.start_time)
-        deduped: List[ShortClient] = [all_shorts[0]]
-        
-        for short in all_shorts[1:]:
-            prev = deduped[-1]
-            # If this short overlaps >50% with the previous one, skip it
-            overlap_start = max(prev.start_time, short.start_time)
-            overlap_end = min(prev.end_time, short.end_time)
-            overlap = max(0, overlap_end - overlap_start)
-            short_duration = max(0.1, short.end_time - short.start_time)
-            
-            if overlap / short_duration < 0.5:
-                deduped.append(short)
+        deduped: List[ShortClient] = []
+        # Kept bounds as plain float lists so the overlap checks don't go
+        # through model attribute lookups
+        kept_starts: List[float] = []
+        kept_ends: List[float] = []
+        # Running max of kept end times; kept shorts before the first entry
+        # exceeding a candidate's start can't overlap it
+        max_ends: List[float] = []
+        
+        for short in all_shorts:
+            start = short.start_time
+            end = short.end_time
+            short_duration = max(0.1, end - start)
+            first = bisect.bisect_right(max_ends, start)
+            # If this short overlaps >50% with a kept one, skip it
+            if any(
+                max(0, min(k_end, end) - max(k_start, start)) / short_duration >= 0.5
+                for k_start, k_end in zip(kept_starts[first:], kept_ends[first:])
+            ):
+                continue
+            deduped.append(short)
+            kept_starts.append(start)
+            kept_ends.append(end)
+            max_ends.append(max(max_ends[-1], end) if max_ends else end)
         
         final_shorts = self._rank_and_spread(
             deduped,
@@ -871,7 +1512,9 @@ class ShortsAgent:
         chunk_minutes: float = 15.0,
         on_progress=None,
         target_shorts: int = 5,
-        min_gap_seconds: float = 90.0
+        min_gap_seconds: float = 90.0,
+        pack_chunks: bool = False,
+        max_concurrency: Optional[int] = None
     ) -> ShortsOutput:
         """
         Select shorts with retry logic. Supports chunked mode for large transcripts.
@@ -885,40 +1528,41 @@ class ShortsAgent:
             on_progress: Optional callback for chunk progress
             target_shorts: Maximum number of shorts to return
             min_gap_seconds: Minimum spacing between clips by midpoint
+            pack_chunks: In chunked mode, send several chunks per LLM request
+            max_concurrency: In chunked mode, chunk LLM calls in flight at once
+                (default: see select_shorts_chunked)
             
         Returns:
             ShortsOutput with selected shorts
         """
-        last_error = None
-        
-        select_fn = (
-            (lambda: self.select_shorts_chunked(
+        if use_chunking:
+            select_fn = functools.partial(
+                self.select_shorts_chunked,
                 transcription_result,
                 brand_info,
                 chunk_minutes,
                 on_progress,
                 target_shorts=target_shorts,
-                min_gap_seconds=min_gap_seconds
-            ))
-            if use_chunking
-            else (lambda: self.select_shorts(
+                min_gap_seconds=min_gap_seconds,
+                max_concurrency=max_concurrency,
+                pack_chunks=pack_chunks
+            )
+        else:
+            select_fn = functools.partial(
+                self.select_shorts,
                 transcription_result,
                 brand_info,
                 target_shorts=target_shorts,
                 min_gap_seconds=min_gap_seconds
-            ))
-        )
+            )
         
         for attempt in range(max_retries + 1):
             try:
                 return select_fn()
-            except Exception as e:
-                last_error = e
-                if attempt < max_retries:
-                    print(f"Attempt {attempt + 1} failed, retrying...")
-                else:
-                    raise last_error
-        
-        raise last_error
-        
-        raise last_error
+            except Exception:
+                if attempt >= max_retries:
+                    raise
+                # Exponential backoff so a throttled provider isn't hammered
+                delay = min(self.RETRY_MAX_DELAY, self.RETRY_BASE_DELAY * (2 ** attempt))
+                print(f"Attempt {attempt + 1} failed, retrying in {delay:.0f}s...")
+                time.sleep(delay)
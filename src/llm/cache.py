@@ -0,0 +1,62 @@
+"""Disk-backed cache for LLM short-selection responses"""
+
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+try:
+    import diskcache
+    DISKCACHE_AVAILABLE = True
+except ImportError:
+    DISKCACHE_AVAILABLE = False
+    diskcache = None
+
+
+class ResponseCache:
+    """
+    Persistent key -> bytes store used to skip repeated LLM calls across runs.
+
+    Uses diskcache when installed, otherwise one file per key in `directory`.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Initialize the cache.
+
+        Args:
+            directory: Directory that holds the cache (created if missing)
+        """
+        self.directory = Path(directory).expanduser()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._store = diskcache.Cache(str(self.directory)) if DISKCACHE_AVAILABLE else None
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached value for `key`, or None on a miss."""
+        if self._store is not None:
+            return self._store.get(key)
+        try:
+            return self._path(key).read_bytes()
+        except OSError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store `value` under `key`."""
+        if self._store is not None:
+            self._store.set(key, value)
+            return
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=str(self.directory), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(value)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
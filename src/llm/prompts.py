@@ -3,16 +3,21 @@
 '''i need to make sure that if more than 2 ppl then it crops both ppl in the frame else it
 puts one person in one frame'''
 
+import functools
+
 from langchain_core.prompts import ChatPromptTemplate
 
+__all__ = [
+    "get_shorts_selection_prompt",
+    "get_shorts_batch_selection_prompt",
+    "get_shorts_repair_prompt",
+    "get_titles_reasons_prompt",
+    "format_transcript_for_llm",
+    "format_brand_context",
+]
 
-def get_shorts_selection_prompt() -> ChatPromptTemplate:
-    """Get the prompt template for calling LLM to select shorts"""
-    
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", """You are an API that converts video transcripts into a JSON array of video clips.
-
-Your goal is to select engaging segments (15-60 seconds each) from the provided transcript. Each clip must be long enough to stand alone and feel complete, with enough context to be funny, viral, informative, and engaging. Prefer 20-40s when possible; only go near 60s if retention is exceptional.
+# Shared by the single-transcript and packed multi-chunk selection prompts
+CLIP_SELECTION_CRITERIA = """Your goal is to select engaging segments (15-60 seconds each) from the provided transcript. Each clip must be long enough to stand alone and feel complete, with enough context to be funny, viral, informative, and engaging. Prefer 20-40s when possible; only go near 60s if retention is exceptional.
 
 Use these go/no-go metrics when deciding if a moment is clip-worthy. A clip should hit at least 3 of these:
 1) Hook strength in the first sentence (clickable, strong statement, question people care about, emotional shift). If the first sentence is not clickable, do not clip.
@@ -21,7 +26,18 @@ Use these go/no-go metrics when deciding if a moment is clip-worthy. A clip shou
 4) One clear idea (summarize in one sentence).
 5) Quote-ability (would work as a bold on-screen caption).
 6) Loop potential (ends on punchline, cliffhanger, or unfinished thought).
+"""
+
+
+# Templates are immutable; build each once and share it
+@functools.lru_cache(maxsize=None)
+def get_shorts_selection_prompt() -> ChatPromptTemplate:
+    """Get the prompt template for calling LLM to select shorts"""
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are an API that converts video transcripts into a JSON array of video clips.
 
+""" + CLIP_SELECTION_CRITERIA + """
 CRITICAL INSTRUCTION: You must output ONLY valid JSON. Do not include any thinking, reasoning, or markdown formatting outside the JSON object.
 All titles and reasons MUST be in English only. If the transcript is not English, translate/summarize into English.
 
@@ -41,8 +57,8 @@ Output Structure:
 Rules:
 1. "start_time" and "end_time" must be PURE NUMBERS (floats in seconds). DO NOT include units like "s" or "min".
 2. Do NOT use timecodes like HH:MM:SS or 10.56.39.32. Only seconds as a number.
-3. "title" must describe the clip's topic in clear, specific language (like a headline). Do not use generic or filler titles.
-4. "reason" is REQUIRED and must reference the actual content (hook, twist, punchline, strong claim, conflict, or payoff). Do not use generic filler.
+3. "title" must describe the clip's topic in clear, specific language (like a headline, 4-12 words). Do not use generic or filler titles.
+4. "reason" is REQUIRED: 1-2 sentences (90-180 characters) that reference the actual content (hook, twist, punchline, strong claim, conflict, or payoff). Do not use generic filler.
 5. Select clips that are self-contained and engaging (hooks, complete thoughts).
 6. Avoid back-to-back clips. Spread selections across the full transcript timeline.
 7. If no good clips are found, return an empty list for "shorts".
@@ -53,20 +69,69 @@ Rules:
 12. Example INVALID start_time: "10.5s"
 13. Output titles and reasons in English only (no Urdu/Hindi or other scripts).
 """),
+        # Per-call settings first and the transcript (largest, unique per
+        # call) last, so the static system prompt is a stable cacheable prefix
         ("human", """Analyze the following transcript and return the JSON object.
 Return up to {target_shorts} clips.
-Keep clips at least {min_gap_seconds} seconds apart by start time.
+Keep clips at least {min_gap_seconds} seconds apart by start time.{brand_context}
 
 Transcript:
 {transcript}
+""")
+    ])
+    
+    return prompt
 
-{brand_context}
+
+@functools.lru_cache(maxsize=None)
+def get_shorts_batch_selection_prompt() -> ChatPromptTemplate:
+    """Prompt template for selecting shorts from several transcript chunks in one call"""
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are an API that converts several video transcript chunks into JSON lists of video clips, one list per chunk.
+
+""" + CLIP_SELECTION_CRITERIA + """
+CRITICAL INSTRUCTION: You must output ONLY valid JSON. Do not include any thinking, reasoning, or markdown formatting outside the JSON object.
+All titles and reasons MUST be in English only. If the transcript is not English, translate/summarize into English.
+
+Output Structure (one entry per chunk, in chunk order):
+{{
+  "results": [
+    {{
+      "chunk_index": 0,
+      "shorts": [
+        {{
+          "title": "Compelling Title",
+          "start_time": 10.5,
+          "end_time": 45.2,
+          "reason": "Brief reason"
+        }}
+      ]
+    }}
+  ]
+}}
+
+Rules:
+1. "chunk_index" is the number from the "### CHUNK <n>" header the clips come from.
+2. Every clip must lie entirely inside its own chunk; never span two chunks.
+3. "start_time" and "end_time" must be PURE NUMBERS (floats in seconds) taken from the transcript timestamps. No units, no timecodes.
+4. "title" must describe the clip's topic in clear, specific language (4-12 words). "reason" must be 1-2 sentences (90-180 characters) that reference the actual content.
+5. If a chunk has no good clips, return an empty "shorts" list for it.
+6. Allowed keys in each short: "title", "start_time", "end_time", "reason". No other keys.
+7. Do not output anything else (no <think> tags, no markdown blocks).
+"""),
+        ("human", """Analyze each of the following {chunk_count} transcript chunks and return the JSON object.
+Return up to {target_shorts} clips per chunk.
+Keep clips at least {min_gap_seconds} seconds apart by start time.{brand_context}
+
+{chunks}
 """)
     ])
     
     return prompt
 
 
+@functools.lru_cache(maxsize=None)
 def get_shorts_repair_prompt() -> ChatPromptTemplate:
     """Prompt template for repairing malformed LLM output into valid JSON."""
     prompt = ChatPromptTemplate.from_messages([
@@ -97,6 +162,7 @@ Rules:
     return prompt
 
 
+@functools.lru_cache(maxsize=None)
 def get_titles_reasons_prompt() -> ChatPromptTemplate:
     """Prompt template for generating coherent titles and reasons from clip text."""
     prompt = ChatPromptTemplate.from_messages([
@@ -106,11 +172,11 @@ You will be given multiple clip excerpts. Each excerpt includes a short transcri
 Return ONLY valid JSON. No extra text, no markdown.
 
 Output format:
-{
+{{
   "items": [
-    { "index": 0, "title": "Specific headline", "reason": "1-2 sentences that reference the excerpt." }
+    {{ "index": 0, "title": "Specific headline", "reason": "1-2 sentences that reference the excerpt." }}
   ]
-}
+}}
 
 Rules:
 1) Each title must be specific and descriptive (4-12 words). Avoid generic filler.
@@ -138,19 +204,17 @@ def format_transcript_for_llm(transcription_result: dict) -> str:
         Formatted transcript string
     """
     lines = []
+    append = lines.append
     
-    if "segments" in transcription_result:
-        for segment in transcription_result["segments"]:
-            start = segment.get("start", 0)
-            end = segment.get("end", 0)
-            text = segment.get("text", "")
-            speaker = segment.get("speaker", "")
-            
-            time_str = f"[{start:.2f}s - {end:.2f}s]"
-            if speaker:
-                lines.append(f"{time_str} {speaker}: {text}")
-            else:
-                lines.append(f"{time_str} {text}")
+    # One f-string per line (no intermediate time string); this runs for
+    # every chunk and retry of a long transcript
+    for segment in transcription_result.get("segments", ()):
+        get = segment.get
+        speaker = get("speaker")
+        if speaker:
+            append(f"[{get('start', 0):.2f}s - {get('end', 0):.2f}s] {speaker}: {get('text', '')}")
+        else:
+            append(f"[{get('start', 0):.2f}s - {get('end', 0):.2f}s] {get('text', '')}")
     
     return "\n".join(lines)
 
@@ -1,13 +1,17 @@
 """LLM provider factory for multiple LLM backends"""
 
+import importlib.util
 import os
 from enum import Enum
 from typing import Optional, Any
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_community.chat_models import ChatOllama
 from langchain_core.language_models import BaseChatModel
 
+# Provider SDKs (openai, anthropic, langchain_community) and httpx are
+# imported inside get_llm_provider / _get_http_client so only the selected
+# backend is ever loaded
+
+_HTTP_CLIENT = None
+
 
 class LLMProvider(str, Enum):
     """Supported LLM providers"""
@@ -17,6 +21,43 @@ class LLMProvider(str, Enum):
     OLLAMA = "ollama"
 
 
+def _get_http_client():
+    """
+    Shared keep-alive HTTP client for OpenAI-compatible providers.
+    
+    Reusing one connection pool across clients, retries and concurrent chunk
+    requests avoids a TCP/TLS handshake per call. Uses HTTP/2 when h2 is
+    installed. Returns None (SDK default client) if httpx is unavailable.
+    """
+    global _HTTP_CLIENT
+    if _HTTP_CLIENT is not None:
+        return _HTTP_CLIENT
+    try:
+        import httpx
+    except ImportError:
+        return None
+    # httpx imports h2 itself when http2=True; only check it is installed
+    http2 = importlib.util.find_spec("h2") is not None
+    _HTTP_CLIENT = httpx.Client(
+        http2=http2,
+        timeout=httpx.Timeout(300.0, connect=10.0),
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+    )
+    return _HTTP_CLIENT
+
+
+def _env_int(name: str, default: Optional[int] = None) -> Optional[int]:
+    """Read an integer tuning knob from the environment, ignoring bad values."""
+    value = os.getenv(name)
+    if not value:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        print(f"Warning: Ignoring non-integer {name}={value!r}")
+        return default
+
+
 def get_llm_provider(
     openai_key: Optional[str] = None,
     anthropic_key: Optional[str] = None,
@@ -28,12 +69,16 @@ def get_llm_provider(
     Get LLM provider based on available API keys.
     Priority: OpenAI > Anthropic > Grok > Ollama (default)
     
+    Ollama runtime options can be tuned with OLLAMA_NUM_CTX (context window,
+    default 32768), OLLAMA_NUM_THREAD (CPU threads, default: Ollama picks the
+    physical core count) and OLLAMA_NUM_GPU (layers offloaded to the GPU).
+    
     Args:
         openai_key: OpenAI API key
         anthropic_key: Anthropic API key
         grok_key: Grok API key
         ollama_base_url: Ollama base URL (default: http://localhost:11434)
-        ollama_model: Ollama model name (default: llama3.1:8b)
+        ollama_model: Ollama model name (default: deepseek-r1:1.5b)
         
     Returns:
         Tuple of (LLM instance, provider type)
@@ -47,12 +92,14 @@ def get_llm_provider(
     # Priority order: OpenAI > Anthropic > Grok > Ollama
     if openai_key:
         try:
+            from langchain_openai import ChatOpenAI
             llm = ChatOpenAI(
                 model="gpt-4o-mini",  # Using cost-effective model
                 api_key=openai_key,
                 temperature=0.7,
                 timeout=300,  # 5 minute timeout for long transcripts
-                max_retries=2
+                max_retries=2,
+                http_client=_get_http_client()
             )
             return llm, LLMProvider.OPENAI
         except Exception as e:
@@ -60,6 +107,7 @@ def get_llm_provider(
     
     if anthropic_key:
         try:
+            from langchain_anthropic import ChatAnthropic
             llm = ChatAnthropic(
                 model="claude-3-haiku-20240307",  # Using cost-effective model
                 api_key=anthropic_key,
@@ -74,13 +122,15 @@ def get_llm_provider(
     if grok_key:
         try:
             # Grok via OpenAI-compatible API (xAI)
+            from langchain_openai import ChatOpenAI
             llm = ChatOpenAI(
                 model="grok-beta",
                 api_key=grok_key,
                 base_url="https://api.x.ai/v1",
                 temperature=0.7,
                 timeout=300,  # 5 minute timeout for long transcripts
-                max_retries=2
+                max_retries=2,
+                http_client=_get_http_client()
             )
             return llm, LLMProvider.GROK
         except Exception as e:
@@ -88,11 +138,14 @@ def get_llm_provider(
     
     # Default to Ollama with Llama 3.1
     try:
+        from langchain_community.chat_models import ChatOllama
         llm = ChatOllama(
             model=ollama_model,
             base_url=ollama_base_url,
             temperature=0.7,
-            num_ctx=32768,  # Larger context window for long transcripts
+            num_ctx=_env_int("OLLAMA_NUM_CTX", 32768),  # Larger context window for long transcripts
+            num_thread=_env_int("OLLAMA_NUM_THREAD"),
+            num_gpu=_env_int("OLLAMA_NUM_GPU"),
             timeout=600  # 10 minute timeout for local models (can be slower)
         )
         return llm, LLMProvider.OLLAMA
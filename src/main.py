@@ -1,25 +1,26 @@
 """Main CLI entry point for Shortie"""
 
-import json
+import itertools
 import os
 import sys
+import threading
+from concurrent.futures import Future
 from pathlib import Path
 from typing import Optional
 import click
 from dotenv import load_dotenv
 
-from .asr import Transcriber, Diarizer
-from .llm import get_llm_provider, ShortsAgent
+# ASR and LLM modules (numpy, langchain, model runtimes) are imported where
+# they are first used, so --help and early validation errors stay fast
 from .models.brand import BrandInfo
 from .models.output import ShortsOutput
-from .utils.video import validate_video_file, extract_audio, get_video_duration, extract_audio_chunks
+from .utils.json_io import json_dumpb, json_loads
+from .utils.video import validate_video_file, extract_audio, extract_audio_array, get_video_duration, iter_audio_chunks
 
 
 # Load environment variables
 load_dotenv()
 
-print("DEBUG: STARTING WITH PATCHES v2", flush=True)
-
 def _cuda_available() -> bool:
     try:
         import torch
@@ -28,12 +29,58 @@ def _cuda_available() -> bool:
         return False
 
 def _resolve_asr_device(device: str, compute_type: str) -> tuple[str, str]:
-    if device and device != "auto":
-        return device, compute_type
-    if _cuda_available():
-        # Prefer GPU when available
-        return "cuda", "float16"
-    return "cpu", "int8"
+    from .asr.transcriber import resolve_compute_type, resolve_device
+    # Prefer GPU when available
+    device = resolve_device(device)
+    return device, resolve_compute_type(device, compute_type)
+
+def _resolve_asr_workers(asr_workers: int, device: str, cpu_threads: int, num_chunks: int) -> int:
+    """Pick how many chunks to transcribe at once (each worker uses cpu_threads cores)."""
+    if asr_workers > 0:
+        return max(1, min(asr_workers, num_chunks))
+    if device == "cuda":
+        # A single GPU is already saturated by one batched worker
+        return 1
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cores = os.cpu_count() or 1
+    return max(1, min(num_chunks, cores // max(1, cpu_threads)))
+
+def _run_in_background(fn, *args, **kwargs) -> Future:
+    """
+    Run fn on a one-off daemon thread; join via the returned future.
+    
+    ThreadPoolExecutor workers are joined at interpreter exit, so an error
+    or Ctrl-C would block until e.g. diarization finished. A daemon thread
+    is abandoned instead.
+    """
+    future: Future = Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=run, name=getattr(fn, "__name__", "background"), daemon=True).start()
+    return future
+
+def _init_llm_provider(**provider_kwargs):
+    """Import the LLM stack and build the provider (runs on a worker thread)."""
+    from .llm import get_llm_provider
+    return get_llm_provider(**provider_kwargs)
+
+def _start_diarization(audio_path: str, hf_token: str) -> tuple["Diarizer", Future]:
+    """Start speaker detection on a worker thread so it overlaps transcription."""
+    from .asr import Diarizer
+    diarizer_device = "cuda" if _cuda_available() else "cpu"
+    diarizer = Diarizer(hf_token=hf_token, device=diarizer_device)
+    return diarizer, _run_in_background(diarizer.detect_speakers, audio_path)
 
 @click.command()
 @click.argument('video_path', type=click.Path(exists=True))
@@ -43,12 +90,18 @@ def _resolve_asr_device(device: str, compute_type: str) -> tuple[str, str]:
 @click.option('--brand-file', type=click.Path(exists=True), help='Path to JSON file with brand information')
 @click.option('--output', default='shorts_output.json', help='Output JSON file path')
 @click.option('--skip-diarization', is_flag=True, help='Skip speaker diarization')
-@click.option('--model-size', default='tiny', help='Whisper model size (tiny, base, small, medium, large-v2, large-v3). Default is "tiny" for speed.')
+@click.option('--model-size', default='tiny', help='Whisper model size (tiny, base, small, medium, large-v2, large-v3, turbo, distil). Default is "tiny" for speed.')
+@click.option('--device', default='auto', type=click.Choice(['auto', 'cpu', 'cuda']), help='Device for Whisper inference ("auto" uses CUDA when available)')
 @click.option('--hf-token', help='HuggingFace token for diarization (or set HF_TOKEN env var)')
 @click.option('--cpu-threads', default=4, type=int, help='Number of threads for CPU inference')
+@click.option('--asr-workers', default=0, type=int, help='Audio chunks transcribed in parallel on long videos (0 = auto: one per --cpu-threads cores on CPU, 1 on GPU)')
+@click.option('--compute-type', default='auto', help='Whisper compute type (auto, int8, int8_float16, int8_float32, float16, float32). "auto" quantizes to int8_float16 on GPU, int8 on CPU.')
 @click.option('--chunk-duration', default=600, help='Audio chunk duration in seconds (default 600 = 10 min). Set lower to test chunking on short videos.')
 @click.option('--target-shorts', default=None, type=int, help='Number of shorts to select (default: 5, or 15 for 60+ min videos)')
 @click.option('--min-gap-seconds', default=90, type=int, help='Minimum spacing between clips by midpoint (seconds)')
+@click.option('--pack-llm-chunks', is_flag=True, help='Send several transcript chunks per LLM request (fewer requests; best with hosted models)')
+@click.option('--llm-concurrency', default=0, type=int, help='Chunk LLM requests in flight at once on long videos (0 = auto: 1 for local Ollama, 4 for hosted providers)')
+@click.option('--llm-cache-dir', default=None, type=click.Path(file_okay=False), help='Directory for caching LLM selections so re-runs on the same transcript skip the LLM')
 def main(
     video_path: str,
     openai_key: Optional[str],
@@ -58,11 +111,17 @@ def main(
     output: str,
     skip_diarization: bool,
     model_size: str,
+    device: str,
     hf_token: Optional[str],
     cpu_threads: int,
+    asr_workers: int,
+    compute_type: str,
     chunk_duration: int,
     target_shorts: Optional[int],
-    min_gap_seconds: int
+    min_gap_seconds: int,
+    pack_llm_chunks: bool,
+    llm_concurrency: int,
+    llm_cache_dir: Optional[str]
 ):
 
     """
@@ -76,13 +135,23 @@ def main(
         validate_video_file(video_path)
         click.echo("✓ Video file validated")
         
+        # Provider setup is network-bound, so it overlaps Whisper and is
+        # joined right before the LLM step
+        click.echo("Initializing LLM provider in the background...")
+        llm_future = _run_in_background(
+            _init_llm_provider,
+            openai_key=openai_key,
+            anthropic_key=anthropic_key,
+            grok_key=grok_key
+        )
+        
         # Load brand information if provided
         brand_info = None
         if brand_file:
             click.echo(f"Loading brand information from {brand_file}...")
-            with open(brand_file, 'r') as f:
-                brand_data = json.load(f)
-                brand_info = BrandInfo(**brand_data).model_dump()
+            # format_brand_context takes a plain dict; validate once and dump it
+            with open(brand_file, 'r', encoding='utf-8') as f:
+                brand_info = BrandInfo.model_validate(json_loads(f.read())).model_dump()
             click.echo("✓ Brand information loaded")
         
         # Get video duration to decide chunking strategy
@@ -97,115 +166,149 @@ def main(
                 target_shorts = 5
         click.echo(f"✓ Video duration: {duration:.1f}s ({duration/60:.1f} min)")
         
+        from .asr import Transcriber
+        
         use_chunking = duration > chunk_duration
         audio_paths_to_cleanup = []
         
+        # Diarization only needs the audio, so it runs in the background
+        # while Whisper transcribes and is joined before the LLM step
+        hf_token = hf_token or os.getenv("HF_TOKEN")
+        run_diarization = not skip_diarization and bool(hf_token)
+        diarizer = None
+        diarization_future = None
+        
         if use_chunking:
             # ── CHUNKED PATH (long videos) ──
-            num_chunks = -(-int(duration) // chunk_duration)  # ceiling division
+            num_chunks = int(-(-duration // chunk_duration))  # ceiling division
             click.echo(f"Video is long — splitting into {num_chunks} chunks of {chunk_duration}s each")
             
-            # Extract audio chunks
+            # Load the Whisper model while ffmpeg extracts the audio
+            device, compute_type = _resolve_asr_device(device, compute_type)
+            num_workers = _resolve_asr_workers(asr_workers, device, cpu_threads, num_chunks)
+            transcriber = Transcriber(
+                model_size=model_size,
+                device=device,
+                compute_type=compute_type,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers
+            )
+            model_future = _run_in_background(transcriber.preload)
+            
+            # Diarization needs the full audio; decode the video once and cut
+            # the transcription chunks out of that WAV instead of decoding again
+            full_audio_path = None
+            if run_diarization:
+                click.echo("ℹ Diarization with chunked audio: extracting full audio for speaker detection...")
+                full_audio_path = extract_audio(video_path)
+                audio_paths_to_cleanup.append(full_audio_path)
+                click.echo("Starting speaker diarization in the background...")
+                diarizer, diarization_future = _start_diarization(full_audio_path, hf_token)
+            
+            # Extract audio chunks lazily: the first one while the model loads,
+            # the rest while earlier chunks are being transcribed
             click.echo("Extracting audio chunks...")
             def on_extract_progress(current, total):
                 click.echo(f"  Extracting chunk {current}/{total}...")
             
-            chunks = extract_audio_chunks(
+            chunk_paths = []
+            def tracked_chunks(chunk_iter):
+                # Track chunk files for cleanup as they are written
+                for chunk_path, offset in chunk_iter:
+                    chunk_paths.append(chunk_path)
+                    yield chunk_path, offset
+            
+            chunks = tracked_chunks(iter_audio_chunks(
                 video_path,
                 chunk_duration=float(chunk_duration),
-                on_progress=on_extract_progress
-            )
-            click.echo(f"✓ Extracted {len(chunks)} audio chunks")
-            
-            # Track chunk files for cleanup
-            audio_paths_to_cleanup = [path for path, _ in chunks]
+                on_progress=on_extract_progress,
+                total_duration=duration,
+                audio_path=full_audio_path
+            ))
+            first_chunk = next(chunks, None)
+            if first_chunk is None:
+                raise RuntimeError("No audio chunks were produced")
             
             # Transcribe all chunks
-            device, compute_type = _resolve_asr_device("auto", "int8")
-            click.echo(f"Transcribing audio chunks with Faster Whisper (Model: {model_size}, Device: {device}, Compute: {compute_type}, Threads: {cpu_threads})...")
-            with Transcriber(
-                model_size=model_size,
-                device=device,
-                compute_type=compute_type,
-                cpu_threads=cpu_threads
-            ) as transcriber:
+            click.echo(f"Transcribing audio chunks with Faster Whisper (Model: {model_size}, Device: {device}, Compute: {compute_type}, Threads: {cpu_threads}, Workers: {num_workers})...")
+            model_future.result()
+            with transcriber:
                 def on_transcribe_progress(current, total):
                     click.echo(f"  Transcribing chunk {current}/{total}...")
                 
                 transcription_result = transcriber.transcribe_chunks(
-                    chunks,
+                    itertools.chain([first_chunk], chunks),
                     word_timestamps=True,
                     vad_filter=True,
-                    on_progress=on_transcribe_progress
+                    on_progress=on_transcribe_progress,
+                    num_chunks=num_chunks
                 )
-            click.echo(f"✓ Transcription complete ({len(transcription_result['segments'])} segments from {len(chunks)} chunks)")
+            audio_paths_to_cleanup.extend(chunk_paths)
+            click.echo(f"✓ Transcription complete ({len(transcription_result['segments'])} segments from {len(chunk_paths)} chunks)")
             click.echo(f"  Detected language: {transcription_result['language']}")
-            
-            # For diarization, we need a full audio file
-            if not skip_diarization:
-                click.echo("ℹ Diarization with chunked audio: extracting full audio for speaker detection...")
-                full_audio_path = extract_audio(video_path)
-                audio_paths_to_cleanup.append(full_audio_path)
-                audio_path_for_diarization = full_audio_path
-            else:
-                audio_path_for_diarization = None
         else:
             # ── SINGLE-FILE PATH (short videos, original behavior) ──
-            click.echo("Extracting audio from video...")
-            audio_path = extract_audio(video_path)
-            audio_paths_to_cleanup.append(audio_path)
-            click.echo(f"✓ Audio extracted to {audio_path}")
-            
-            device, compute_type = _resolve_asr_device("auto", "int8")
-            click.echo(f"Transcribing audio with Faster Whisper (Model: {model_size}, Device: {device}, Compute: {compute_type}, Threads: {cpu_threads})...")
-            with Transcriber(
+            # Load the Whisper model while ffmpeg extracts the audio
+            device, compute_type = _resolve_asr_device(device, compute_type)
+            transcriber = Transcriber(
                 model_size=model_size,
                 device=device,
                 compute_type=compute_type,
                 cpu_threads=cpu_threads
-            ) as transcriber:
+            )
+            model_future = _run_in_background(transcriber.preload)
+            
+            click.echo("Extracting audio from video...")
+            if run_diarization:
+                # The diarization pipeline loads audio from a file
+                audio_path = extract_audio(video_path)
+                audio_paths_to_cleanup.append(audio_path)
+                click.echo(f"✓ Audio extracted to {audio_path}")
+                
+                click.echo("Starting speaker diarization in the background...")
+                diarizer, diarization_future = _start_diarization(audio_path, hf_token)
+                audio = audio_path
+            else:
+                # Whisper takes the waveform directly, so skip the temp WAV
+                audio = extract_audio_array(video_path)
+                click.echo(f"✓ Audio extracted ({len(audio) / 16000:.1f}s)")
+            
+            click.echo(f"Transcribing audio with Faster Whisper (Model: {model_size}, Device: {device}, Compute: {compute_type}, Threads: {cpu_threads})...")
+            model_future.result()
+            with transcriber:
                 transcription_result = transcriber.transcribe(
-                    audio_path,
+                    audio,
                     word_timestamps=True,
                     vad_filter=True
                 )
             click.echo(f"✓ Transcription complete ({len(transcription_result['segments'])} segments)")
             click.echo(f"  Detected language: {transcription_result['language']}")
-            
-            audio_path_for_diarization = audio_path
         
-        # Perform speaker diarization (optional)
-        if not skip_diarization and audio_path_for_diarization:
-            hf_token = hf_token or os.getenv("HF_TOKEN")
-            if hf_token:
-                click.echo("Performing speaker diarization...")
-                try:
-                    diarizer_device = "cuda" if _cuda_available() else "cpu"
-                    diarizer = Diarizer(hf_token=hf_token, device=diarizer_device)
-                    diarization_result = diarizer.diarize(audio_path_for_diarization, transcription_result)
-                    if diarization_result:
-                        transcription_result = diarizer.merge_with_transcription(
-                            transcription_result,
-                            diarization_result
-                        )
-                        click.echo(f"✓ Diarization complete ({transcription_result.get('num_speakers', 0)} speakers)")
-                    else:
-                        click.echo("⚠ Diarization unavailable (no HF token)")
-                except Exception as e:
-                    click.echo(f"⚠ Diarization failed: {e}. Continuing without speaker labels...")
-            else:
-                click.echo("ℹ Skipping diarization (HF_TOKEN not provided - optional feature)")
+        # Collect speaker diarization (optional)
+        if diarization_future is not None:
+            click.echo("Waiting for speaker diarization...")
+            try:
+                diarize_segments = diarization_future.result()
+                if diarize_segments is not None:
+                    diarization_result = diarizer.assign_speakers(diarize_segments, transcription_result)
+                    transcription_result = diarizer.merge_with_transcription(
+                        transcription_result,
+                        diarization_result,
+                        diarize_segments=diarize_segments,
+                        inplace=True
+                    )
+                    click.echo(f"✓ Diarization complete ({transcription_result.get('num_speakers', 0)} speakers)")
+                else:
+                    click.echo("⚠ Diarization unavailable (no HF token)")
+            except Exception as e:
+                click.echo(f"⚠ Diarization failed: {e}. Continuing without speaker labels...")
+        elif skip_diarization:
+            click.echo("Skipping speaker diarization (--skip-diarization flag)")
         else:
-            if skip_diarization:
-                click.echo("Skipping speaker diarization (--skip-diarization flag)")
+            click.echo("ℹ Skipping diarization (HF_TOKEN not provided - optional feature)")
         
-        # Initialize LLM provider
-        click.echo("Initializing LLM provider...")
-        llm, provider = get_llm_provider(
-            openai_key=openai_key,
-            anthropic_key=anthropic_key,
-            grok_key=grok_key
-        )
+        # Collect the LLM provider started after validation
+        llm, provider = llm_future.result()
         click.echo(f"✓ Using LLM provider: {provider.value}")
         
         # Create shorts agent
@@ -217,7 +320,9 @@ def main(
             click.echo("Analyzing transcript and selecting shorts...")
             on_llm_progress = None
         
-        agent = ShortsAgent(llm)
+        from .llm import ShortsAgent, ResponseCache
+        response_cache = ResponseCache(llm_cache_dir) if llm_cache_dir else None
+        agent = ShortsAgent(llm, cache=response_cache)
         shorts_output = agent.select_shorts_with_retry(
             transcription_result,
             brand_info=brand_info,
@@ -225,15 +330,16 @@ def main(
             chunk_minutes=8.0,
             on_progress=on_llm_progress,
             target_shorts=target_shorts,
-            min_gap_seconds=float(min_gap_seconds)
+            min_gap_seconds=float(min_gap_seconds),
+            pack_chunks=pack_llm_chunks,
+            max_concurrency=llm_concurrency or None
         )
         click.echo(f"✓ Selected {shorts_output.total_shorts} shorts")
         
         # Save output
         click.echo(f"Saving output to {output}...")
         output_path = Path(output)
-        with open(output_path, 'w') as f:
-            json.dump(shorts_output.model_dump(), f, indent=2)
+        output_path.write_bytes(json_dumpb(shorts_output.model_dump(), indent=True))
         click.echo(f"✓ Output saved to {output}")
         
         # Display summary
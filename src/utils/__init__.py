@@ -1,7 +1,8 @@
 """Utility functions"""
 
-from .video import extract_audio, validate_video_file, get_video_duration, extract_audio_chunks
+from .video import extract_audio, extract_audio_array, validate_video_file, get_video_duration, extract_audio_chunks, iter_audio_chunks
 from .clip_refiner import refine_shorts_output
+from .json_io import json_loads, json_dumps, json_dumpb
 
-__all__ = ["extract_audio", "validate_video_file", "get_video_duration", "extract_audio_chunks", "refine_shorts_output"]
+__all__ = ["extract_audio", "extract_audio_array", "validate_video_file", "get_video_duration", "extract_audio_chunks", "iter_audio_chunks", "refine_shorts_output", "json_loads", "json_dumps", "json_dumpb"]
 
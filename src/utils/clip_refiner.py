@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import bisect
 from dataclasses import dataclass
+from itertools import accumulate
 from typing import Dict, Any, List
 
 from ..models.output import ShortsOutput, ShortClient
@@ -36,34 +38,47 @@ def refine_shorts_output(
     segments = transcription_result.get("segments") or []
     if not segments:
         return shorts_output
-    segments = sorted(segments, key=lambda s: s.get("start", 0.0))
 
-    transcript_start = min(seg.get("start", 0.0) for seg in segments)
-    transcript_end = max(seg.get("end", 0.0) for seg in segments)
+    # Segment bounds as parallel lists so every snap is a binary search
+    # instead of a scan over all segments
+    starts = [seg.get("start", 0.0) for seg in segments]
+    # ASR output is already in time order; only sort when it isn't
+    if any(later < earlier for earlier, later in zip(starts, starts[1:])):
+        segments = sorted(segments, key=lambda s: s.get("start", 0.0))
+        starts = [seg.get("start", 0.0) for seg in segments]
+    ends = [seg.get("end", 0.0) for seg in segments]
+    # Running max of ends: its first entry >= t is also the first segment
+    # (in start order) ending at/after t, even when segments overlap
+    max_ends = list(accumulate(ends, max))
+    sorted_ends = sorted(ends)
+
+    transcript_start = starts[0]
+    transcript_end = max_ends[-1]
 
     def clamp_time(t: float) -> float:
         return max(transcript_start, min(transcript_end, t))
 
+    def overlapping_segment(t: float) -> tuple[int, int]:
+        # (first segment with start <= t <= end or -1, count of starts <= t)
+        started = bisect.bisect_right(starts, t)
+        i = bisect.bisect_left(max_ends, t)
+        return (i if i < started else -1), started
+
     def snap_start(t: float) -> float:
         # Find segment that overlaps t, else nearest earlier segment start.
-        for seg in segments:
-            s = seg.get("start", 0.0)
-            e = seg.get("end", 0.0)
-            if s <= t <= e:
-                return s
+        i, started = overlapping_segment(t)
+        if i >= 0:
+            return starts[i]
         # nearest earlier
-        earlier = [seg.get("start", 0.0) for seg in segments if seg.get("start", 0.0) <= t]
-        return max(earlier) if earlier else transcript_start
+        return starts[started - 1] if started else transcript_start
 
     def snap_end(t: float) -> float:
         # Find segment that overlaps t, else nearest later segment end.
-        for seg in segments:
-            s = seg.get("start", 0.0)
-            e = seg.get("end", 0.0)
-            if s <= t <= e:
-                return e
-        later = [seg.get("end", 0.0) for seg in segments if seg.get("end", 0.0) >= t]
-        return min(later) if later else transcript_end
+        i, _ = overlapping_segment(t)
+        if i >= 0:
+            return ends[i]
+        j = bisect.bisect_left(sorted_ends, t)
+        return sorted_ends[j] if j < len(sorted_ends) else transcript_end
 
     def expand_and_snap(start: float, end: float) -> _Window:
         start = clamp_time(start - pad)
@@ -115,47 +130,67 @@ def refine_shorts_output(
             win.end = clamp_time(win.anchor_mid + min_len / 2.0)
         return win
 
-    def is_similar(a: _Window, b: _Window) -> bool:
-        if abs(a.start - b.start) < 0.5 and abs(a.end - b.end) < 0.5:
-            return True
-        overlap_start = max(a.start, b.start)
-        overlap_end = min(a.end, b.end)
-        overlap = max(0.0, overlap_end - overlap_start)
-        dur = max(0.1, min(a.end - a.start, b.end - b.start))
-        return (overlap / dur) >= 0.85
-
-    if min_shorts is not None and len(windows) < min_shorts:
-        span = max(1.0, transcript_end - transcript_start)
-        for i in range(min_shorts):
-            if len(windows) >= min_shorts:
-                break
+    def similar_to_any(start: float, end: float, bounds: List[tuple[float, float]]) -> bool:
+        # Near-identical bounds or >=85% overlap of the shorter clip with any
+        # accepted (start, end); plain tuples keep the per-pair check cheap
+        dur = end - start
+        for other_start, other_end in bounds:
+            if abs(start - other_start) < 0.5 and abs(end - other_end) < 0.5:
+                return True
+            overlap = min(end, other_end) - max(start, other_start)
+            if overlap > 0 and overlap / max(0.1, min(dur, other_end - other_start)) >= 0.85:
+                return True
+        return False
+
+    # Auto-fill candidates depend only on the grid slot, so both fill passes
+    # share them: slot -> (jittered (start, end, anchor_mid) bounds long
+    # enough to use, centered fallback bounds or None)
+    span = max(1.0, transcript_end - transcript_start)
+    auto_candidates: Dict[int, tuple[List[tuple[float, float, float]], tuple[float, float, float] | None]] = {}
+
+    def auto_candidates_for(i: int) -> tuple[List[tuple[float, float, float]], tuple[float, float, float] | None]:
+        if i not in auto_candidates:
             base_mid = transcript_start + (i + 0.5) * (span / min_shorts)
-            added = False
+            attempts = []
             for attempt in range(5):
                 jitter = (attempt - 2) * (min_len * 0.35)
                 mid = clamp_time(base_mid + jitter)
-                start = mid - (min_len / 2.0)
-                end = mid + (min_len / 2.0)
-                expanded = expand_and_snap(start, end)
-                expanded = enforce_length(expanded)
-                if (expanded.end - expanded.start) < min_len:
-                    continue
-                if any(is_similar(expanded, w) for w in windows):
-                    continue
-                expanded.title = "Auto Clip"
-                expanded.reason = "Auto-generated to meet minimum clip count."
-                expanded.score = 0
-                windows.append(expanded)
-                added = True
+                expanded = enforce_length(expand_and_snap(mid - (min_len / 2.0), mid + (min_len / 2.0)))
+                if (expanded.end - expanded.start) >= min_len:
+                    attempts.append((expanded.start, expanded.end, expanded.anchor_mid))
+            expanded = enforce_length(expand_and_snap(base_mid - (min_len / 2.0), base_mid + (min_len / 2.0)))
+            fallback = None
+            if (expanded.end - expanded.start) >= min_len:
+                fallback = (expanded.start, expanded.end, expanded.anchor_mid)
+            auto_candidates[i] = (attempts, fallback)
+        return auto_candidates[i]
+
+    def fill_to_min(pool: List[_Window], bounds: List[tuple[float, float]]) -> None:
+        # Add evenly spread auto clips until the pool holds min_shorts windows
+        for i in range(min_shorts):
+            if len(pool) >= min_shorts:
                 break
-            if not added:
-                expanded = expand_and_snap(base_mid - (min_len / 2.0), base_mid + (min_len / 2.0))
-                expanded = enforce_length(expanded)
-                if (expanded.end - expanded.start) >= min_len and not any(is_similar(expanded, w) for w in windows):
-                    expanded.title = "Auto Clip"
-                    expanded.reason = "Auto-generated to meet minimum clip count."
-                    expanded.score = 0
-                    windows.append(expanded)
+            attempts, fallback = auto_candidates_for(i)
+            for candidate in attempts:
+                if not similar_to_any(candidate[0], candidate[1], bounds):
+                    break
+            else:
+                candidate = fallback
+                if candidate is None or similar_to_any(candidate[0], candidate[1], bounds):
+                    continue
+            start, end, anchor_mid = candidate
+            pool.append(_Window(
+                start=start,
+                end=end,
+                title="Auto Clip",
+                reason="Auto-generated to meet minimum clip count.",
+                score=0,
+                anchor_mid=anchor_mid,
+            ))
+            bounds.append((start, end))
+
+    if min_shorts is not None and len(windows) < min_shorts:
+        fill_to_min(windows, [(w.start, w.end) for w in windows])
 
     if not windows:
         return shorts_output
@@ -174,44 +209,16 @@ def refine_shorts_output(
         merged.append(win)
 
     refined: List[_Window] = []
+    refined_bounds: List[tuple[float, float]] = []
     for win in merged:
         win = enforce_length(win)
         if win.end - win.start >= min_len:
-            if not any(is_similar(win, r) for r in refined):
+            if not similar_to_any(win.start, win.end, refined_bounds):
                 refined.append(win)
+                refined_bounds.append((win.start, win.end))
 
     if min_shorts is not None and len(refined) < min_shorts:
-        span = max(1.0, transcript_end - transcript_start)
-        for i in range(min_shorts):
-            if len(refined) >= min_shorts:
-                break
-            base_mid = transcript_start + (i + 0.5) * (span / min_shorts)
-            added = False
-            for attempt in range(5):
-                jitter = (attempt - 2) * (min_len * 0.35)
-                mid = clamp_time(base_mid + jitter)
-                start = mid - (min_len / 2.0)
-                end = mid + (min_len / 2.0)
-                expanded = expand_and_snap(start, end)
-                expanded = enforce_length(expanded)
-                if (expanded.end - expanded.start) < min_len:
-                    continue
-                if any(is_similar(expanded, r) for r in refined):
-                    continue
-                expanded.title = "Auto Clip"
-                expanded.reason = "Auto-generated to meet minimum clip count."
-                expanded.score = 0
-                refined.append(expanded)
-                added = True
-                break
-            if not added:
-                expanded = expand_and_snap(base_mid - (min_len / 2.0), base_mid + (min_len / 2.0))
-                expanded = enforce_length(expanded)
-                if (expanded.end - expanded.start) >= min_len and not any(is_similar(expanded, r) for r in refined):
-                    expanded.title = "Auto Clip"
-                    expanded.reason = "Auto-generated to meet minimum clip count."
-                    expanded.score = 0
-                    refined.append(expanded)
+        fill_to_min(refined, refined_bounds)
 
     # Cap to requested count, preserve chronological order
     if max_shorts is not None:
@@ -0,0 +1,77 @@
+"""JSON helpers that use orjson when installed, stdlib json otherwise"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+    orjson = None
+
+
+def json_loads(text: str) -> Any:
+    """
+    Parse a JSON document.
+    
+    Raises json.JSONDecodeError on invalid input (orjson's error type subclasses it).
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than the stdlib parser (e.g. it rejects lone
+            # surrogates, raw or \u-escaped); retry so anything json.loads
+            # accepts still parses, and genuinely bad input raises from there
+            pass
+    return json.loads(text)
+
+
+def _orjson_option(indent: bool, sort_keys: bool) -> int:
+    option = orjson.OPT_SERIALIZE_NUMPY
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return option
+
+
+def json_dumps(obj: Any, indent: bool = False, sort_keys: bool = False) -> str:
+    """
+    Serialize an object to a JSON string.
+    
+    Args:
+        obj: Object to serialize (NumPy arrays/scalars are supported with orjson)
+        indent: Pretty-print with 2-space indentation
+        sort_keys: Emit dict keys in sorted order (stable output for hashing)
+        
+    Returns:
+        JSON string
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=_orjson_option(indent, sort_keys)).decode("utf-8")
+        except TypeError:
+            # Lone surrogates, which orjson refuses to encode
+            pass
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys, ensure_ascii=False)
+
+
+def json_dumpb(obj: Any, indent: bool = False, sort_keys: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 JSON bytes, ready to write to a binary file.
+    
+    Same options as json_dumps; with orjson the encoder's output is returned
+    as-is instead of being decoded to str and re-encoded on write.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.dumps(obj, option=_orjson_option(indent, sort_keys))
+        except TypeError:
+            # orjson refuses lone surrogates (e.g. half an emoji from an LLM reply)
+            pass
+    # The stdlib encoder's default ASCII output writes lone surrogates as
+    # \uXXXX escapes, which stays valid UTF-8 and parses back to the same
+    # string; encoding ensure_ascii=False output would raise on them instead
+    return json.dumps(obj, indent=2 if indent else None, sort_keys=sort_keys).encode("ascii")
@@ -2,21 +2,69 @@ import argparse
 import json
 import os
 import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+# Frames decoded ahead of the one being processed; bounds memory to a few
+# decoded images while image IO overlaps MediaPipe inference
+FRAME_PREFETCH = 4
+
+# Longest side frames are downscaled to before inference. The detector and
+# mesh resize their input to under 256px anyway and landmarks are normalized,
+# so centers are unchanged while 1080p/4K frames cost far less to prepare
+MAX_FRAME_SIZE = 1280
 
 
 def log(message: str) -> None:
     print(message, file=sys.stderr, flush=True)
 
 
+def decode_ahead(frame_paths, load_frame, prefetch: int = FRAME_PREFETCH):
+    """
+    Yield (frame_path, future) in order, with up to `prefetch` frames being
+    decoded by `load_frame` in background threads.
+
+    The future is None when the frame file does not exist; otherwise its
+    result() is the decoded image (or re-raises the decode error).
+    """
+    with ThreadPoolExecutor(max_workers=prefetch) as pool:
+        pending = deque()
+        for frame_path in frame_paths:
+            future = pool.submit(load_frame, frame_path) if os.path.exists(frame_path) else None
+            pending.append((frame_path, future))
+            if len(pending) > prefetch:
+                yield pending.popleft()
+        while pending:
+            yield pending.popleft()
+
+
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="MediaPipe face analysis for cropping.")
-    parser.add_argument("--frames", nargs="+", required=True, help="Paths to image frames.")
+    parser.add_argument("--frames", nargs="+", help="Paths to image frames.")
     parser.add_argument(
         "--active-speaker",
         action="store_true",
         help="Enable active speaker heuristic (mouth motion across face tracks).",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log the face count of every frame (default: one summary line per analysis).",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help=(
+            "Stay running and read JSON requests from stdin, one per line: "
+            '{"frames": [...], "active_speaker": false}. '
+            "Each request gets one JSON reply line on stdout."
+        ),
+    )
+    args = parser.parse_args()
+    if not args.daemon and not args.frames:
+        parser.error("--frames is required unless --daemon is given")
+    return args
 
 
 def main() -> int:
@@ -54,84 +102,130 @@ def main() -> int:
         print(json.dumps({"ok": False, "error": f"numpy import failed: {exc}"}))
         return 2
 
-    per_frame = []
-    per_frame_centers = []
-    centers = []
-    multi_face = False
-    speaker_center_x = None
-    speaker_motion = None
-    speaker_frame_ratio = None
-    speaker_motion_ratio = None
-
-    log(f"[mediapipe] active_speaker={1 if args.active_speaker else 0}")
-
-    if args.active_speaker:
-        tracks = {}
-        next_track_id = 1
-        frames_with_faces = 0
-
-        def _match_track(center, width):
-            nonlocal tracks
-            best_id = None
-            best_dist = None
-            for track_id, track in tracks.items():
-                last = track["last_center"]
-                dist = ((center[0] - last[0]) ** 2 + (center[1] - last[1]) ** 2) ** 0.5
-                if best_dist is None or dist < best_dist:
-                    best_dist = dist
-                    best_id = track_id
-            if best_dist is None:
-                return None
-            if best_dist > (0.2 * width):
-                return None
-            return best_id
-
-        with mp.solutions.face_mesh.FaceMesh(
-            max_num_faces=4,
-            refine_landmarks=True,
-            min_detection_confidence=0.5,
-            min_tracking_confidence=0.5,
-        ) as mesh:
-            for frame_path in args.frames:
-                if not os.path.exists(frame_path):
+    # OpenCV ships with mediapipe and decodes JPEGs straight into an array
+    # (libjpeg-turbo); Pillow stays as the fallback
+    try:
+        import cv2
+    except Exception as exc:
+        log(f"[mediapipe] opencv unavailable, decoding frames with Pillow: {exc}")
+        cv2 = None
+
+    def load_frame(frame_path):
+        # Returns the RGB array (at most MAX_FRAME_SIZE on its longest side)
+        # and the original (height, width) that pixel positions are scaled by
+        if cv2 is not None:
+            # Ignore EXIF orientation like Image.open does
+            image_bgr = cv2.imread(frame_path, cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION)
+            if image_bgr is not None:
+                height, width = image_bgr.shape[:2]
+                scale = MAX_FRAME_SIZE / max(height, width)
+                if scale < 1.0:
+                    image_bgr = cv2.resize(
+                        image_bgr,
+                        (max(1, round(width * scale)), max(1, round(height * scale))),
+                        interpolation=cv2.INTER_AREA,
+                    )
+                return cv2.cvtColor(image_bgr, cv2.COLOR_BGR2RGB), (height, width)
+        image = Image.open(frame_path).convert("RGB")
+        width, height = image.size
+        scale = MAX_FRAME_SIZE / max(height, width)
+        if scale < 1.0:
+            image = image.resize(
+                (max(1, round(width * scale)), max(1, round(height * scale))), Image.BOX
+            )
+        return np.array(image), (height, width)
+
+    def open_model(active_speaker):
+        if active_speaker:
+            return mp.solutions.face_mesh.FaceMesh(
+                max_num_faces=4,
+                refine_landmarks=True,
+                min_detection_confidence=0.5,
+                min_tracking_confidence=0.5,
+            )
+        return mp.solutions.face_detection.FaceDetection(
+            model_selection=0, min_detection_confidence=0.5
+        )
+
+    verbose = args.verbose
+
+    def analyze(frame_paths, active_speaker, model):
+        """Run `model` (from open_model) over `frame_paths` and build the JSON payload."""
+        per_frame = []
+        per_frame_centers = []
+        centers = []
+        multi_face = False
+        speaker_center_x = None
+        speaker_motion = None
+        speaker_frame_ratio = None
+        speaker_motion_ratio = None
+
+        log(f"[mediapipe] active_speaker={1 if active_speaker else 0}")
+
+        if active_speaker:
+            tracks = {}
+            next_track_id = 1
+            frames_with_faces = 0
+
+            def _match_track(center, width):
+                nonlocal tracks
+                best_id = None
+                best_dist = None
+                for track_id, track in tracks.items():
+                    last = track["last_center"]
+                    dist = ((center[0] - last[0]) ** 2 + (center[1] - last[1]) ** 2) ** 0.5
+                    if best_dist is None or dist < best_dist:
+                        best_dist = dist
+                        best_id = track_id
+                if best_dist is None:
+                    return None
+                if best_dist > (0.2 * width):
+                    return None
+                return best_id
+
+            for frame_path, frame in decode_ahead(frame_paths, load_frame):
+                if frame is None:
                     log(f"[mediapipe] frame missing: {frame_path}")
                     per_frame.append({"path": frame_path, "faces": 0, "error": "missing"})
                     continue
 
                 try:
-                    image = Image.open(frame_path).convert("RGB")
-                    image_np = np.array(image)
+                    image_np, (image_height, image_width) = frame.result()
                 except Exception as exc:
                     log(f"[mediapipe] failed to read frame {frame_path}: {exc}")
                     per_frame.append({"path": frame_path, "faces": 0, "error": str(exc)})
                     continue
 
-                results = mesh.process(image_np)
+                results = model.process(image_np)
                 landmarks_list = results.multi_face_landmarks or []
                 face_count = len(landmarks_list)
                 per_frame.append({"path": frame_path, "faces": face_count})
-                log(f"[mediapipe] {os.path.basename(frame_path)} faces={face_count}")
+                if verbose:
+                    log(f"[mediapipe] {os.path.basename(frame_path)} faces={face_count}")
 
                 if face_count >= 2:
                     multi_face = True
 
                 detections = []
+                # Per-frame constants, bound once rather than per face
+                frame_width = float(image_width)
+                frame_height = float(image_height)
                 for face_landmarks in landmarks_list:
-                    xs = [lm.x for lm in face_landmarks.landmark]
-                    ys = [lm.y for lm in face_landmarks.landmark]
-                    if not xs or not ys:
+                    landmarks = face_landmarks.landmark
+                    # One pass over the landmarks into a (K, 2) array, then
+                    # vectorized min/max (landmark coords are float32 already)
+                    pts = np.array([(lm.x, lm.y) for lm in landmarks], dtype=np.float32)
+                    if not len(pts):
                         continue
-                    min_x = max(0.0, min(xs))
-                    max_x = min(1.0, max(xs))
-                    min_y = max(0.0, min(ys))
-                    max_y = min(1.0, max(ys))
-                    center_x = ((min_x + max_x) / 2.0) * float(image.width)
-                    center_y = ((min_y + max_y) / 2.0) * float(image.height)
+                    min_x, min_y = np.maximum(pts.min(axis=0), 0.0).tolist()
+                    max_x, max_y = np.minimum(pts.max(axis=0), 1.0).tolist()
+                    center_x = ((min_x + max_x) / 2.0) * frame_width
+                    center_y = ((min_y + max_y) / 2.0) * frame_height
 
                     try:
-                        upper = face_landmarks.landmark[13]
-                        lower = face_landmarks.landmark[14]
-                        mouth_open = abs((upper.y - lower.y)) * float(image.height)
+                        upper = landmarks[13]
+                        lower = landmarks[14]
+                        mouth_open = abs((upper.y - lower.y)) * frame_height
                     except Exception:
                         mouth_open = 0.0
 
@@ -148,7 +242,7 @@ def main() -> int:
                     per_frame_centers.append(None)
 
                 for det in detections:
-                    track_id = _match_track(det["center"], image.width)
+                    track_id = _match_track(det["center"], image_width)
                     if track_id is None:
                         track_id = next_track_id
                         next_track_id += 1
@@ -156,7 +250,7 @@ def main() -> int:
                             "last_center": det["center"],
                             "last_mouth": det["mouth_open"],
                             "motion": 0.0,
-                            "centers": [det["center"][0]],
+                            "sum_center_x": det["center"][0],
                             "frames": 1,
                         }
                         continue
@@ -166,59 +260,57 @@ def main() -> int:
                         track["motion"] += abs(det["mouth_open"] - track["last_mouth"])
                     track["last_center"] = det["center"]
                     track["last_mouth"] = det["mouth_open"]
-                    track["centers"].append(det["center"][0])
+                    track["sum_center_x"] += det["center"][0]
                     track["frames"] += 1
 
-        best_track = None
-        total_motion = 0.0
-        for track in tracks.values():
-            if track["frames"] < 2:
-                continue
-            total_motion += track["motion"]
-            if best_track is None:
-                best_track = track
-                continue
-            if track["motion"] > best_track["motion"]:
-                best_track = track
-
-        if best_track and best_track["centers"]:
-            speaker_center_x = sum(best_track["centers"]) / len(best_track["centers"])
-            speaker_motion = best_track["motion"]
-            if frames_with_faces > 0:
-                speaker_frame_ratio = best_track["frames"] / float(frames_with_faces)
-            if total_motion > 0:
-                speaker_motion_ratio = best_track["motion"] / total_motion
-            centers.append(speaker_center_x)
-            log(f"[mediapipe] speaker_motion={speaker_motion:.4f}")
-            if speaker_frame_ratio is not None:
-                log(f"[mediapipe] speaker_frame_ratio={speaker_frame_ratio:.2f}")
-            if speaker_motion_ratio is not None:
-                log(f"[mediapipe] speaker_motion_ratio={speaker_motion_ratio:.2f}")
+            best_track = None
+            total_motion = 0.0
+            for track in tracks.values():
+                if track["frames"] < 2:
+                    continue
+                total_motion += track["motion"]
+                if best_track is None:
+                    best_track = track
+                    continue
+                if track["motion"] > best_track["motion"]:
+                    best_track = track
+
+            if best_track:
+                # Every track holds at least one center, counted by "frames"
+                speaker_center_x = best_track["sum_center_x"] / best_track["frames"]
+                speaker_motion = best_track["motion"]
+                if frames_with_faces > 0:
+                    speaker_frame_ratio = best_track["frames"] / float(frames_with_faces)
+                if total_motion > 0:
+                    speaker_motion_ratio = best_track["motion"] / total_motion
+                centers.append(speaker_center_x)
+                log(f"[mediapipe] speaker_motion={speaker_motion:.4f}")
+                if speaker_frame_ratio is not None:
+                    log(f"[mediapipe] speaker_frame_ratio={speaker_frame_ratio:.2f}")
+                if speaker_motion_ratio is not None:
+                    log(f"[mediapipe] speaker_motion_ratio={speaker_motion_ratio:.2f}")
+            else:
+                log("[mediapipe] speaker track not found")
         else:
-            log("[mediapipe] speaker track not found")
-    else:
-        with mp.solutions.face_detection.FaceDetection(
-            model_selection=0, min_detection_confidence=0.5
-        ) as detector:
-            for frame_path in args.frames:
-                if not os.path.exists(frame_path):
+            for frame_path, frame in decode_ahead(frame_paths, load_frame):
+                if frame is None:
                     log(f"[mediapipe] frame missing: {frame_path}")
                     per_frame.append({"path": frame_path, "faces": 0, "error": "missing"})
                     continue
 
                 try:
-                    image = Image.open(frame_path).convert("RGB")
-                    image_np = np.array(image)
+                    image_np, (image_height, image_width) = frame.result()
                 except Exception as exc:
                     log(f"[mediapipe] failed to read frame {frame_path}: {exc}")
                     per_frame.append({"path": frame_path, "faces": 0, "error": str(exc)})
                     continue
 
-                results = detector.process(image_np)
+                results = model.process(image_np)
                 detections = results.detections or []
                 face_count = len(detections)
                 per_frame.append({"path": frame_path, "faces": face_count})
-                log(f"[mediapipe] {os.path.basename(frame_path)} faces={face_count}")
+                if verbose:
+                    log(f"[mediapipe] {os.path.basename(frame_path)} faces={face_count}")
 
                 if face_count >= 2:
                     multi_face = True
@@ -234,7 +326,7 @@ def main() -> int:
                             best = bbox
 
                     if best is not None:
-                        center_x = (best.xmin + (best.width / 2.0)) * float(image.width)
+                        center_x = (best.xmin + (best.width / 2.0)) * float(image_width)
                         if np.isfinite(center_x):
                             centers.append(float(center_x))
                             per_frame_centers.append(float(center_x))
@@ -245,19 +337,63 @@ def main() -> int:
                 else:
                     per_frame_centers.append(None)
 
-    avg_center_x = (sum(centers) / len(centers)) if centers else None
-
-    payload = {
-        "ok": True,
-        "multi_face": multi_face,
-        "center_x": avg_center_x,
-        "speaker_center_x": speaker_center_x,
-        "speaker_motion": speaker_motion,
-        "speaker_frame_ratio": speaker_frame_ratio,
-        "speaker_motion_ratio": speaker_motion_ratio,
-        "frame_centers": per_frame_centers,
-        "frames": per_frame,
-    }
+        # One summary line instead of a flushed stderr write per frame
+        # (per-frame counts with --verbose)
+        with_faces = sum(1 for frame in per_frame if frame["faces"])
+        log(
+            f"[mediapipe] frames={len(per_frame)} with_faces={with_faces} "
+            f"multi_face={1 if multi_face else 0}"
+        )
+
+        avg_center_x = (sum(centers) / len(centers)) if centers else None
+
+        payload = {
+            "ok": True,
+            "multi_face": multi_face,
+            "center_x": avg_center_x,
+            "speaker_center_x": speaker_center_x,
+            "speaker_motion": speaker_motion,
+            "speaker_frame_ratio": speaker_frame_ratio,
+            "speaker_motion_ratio": speaker_motion_ratio,
+            "frame_centers": per_frame_centers,
+            "frames": per_frame,
+        }
+        return payload
+
+    if args.daemon:
+        # One JSON request per stdin line, one JSON reply per line. The
+        # stateless face detector is loaded once and kept; FaceMesh tracks
+        # faces from frame to frame, so each request gets a fresh one and
+        # replies match a one-shot run over the same frames.
+        with ExitStack() as stack:
+            detector = None
+            for line in sys.stdin:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    frame_paths = [str(path) for path in request["frames"]]
+                    active_speaker = bool(request.get("active_speaker", False))
+                except (ValueError, KeyError, TypeError, AttributeError) as exc:
+                    print(json.dumps({"ok": False, "error": f"invalid request: {exc}"}), flush=True)
+                    continue
+
+                try:
+                    if active_speaker:
+                        with open_model(True) as mesh:
+                            payload = analyze(frame_paths, True, mesh)
+                    else:
+                        if detector is None:
+                            detector = stack.enter_context(open_model(False))
+                        payload = analyze(frame_paths, False, detector)
+                except Exception as exc:
+                    log(f"[mediapipe] request failed: {exc}")
+                    payload = {"ok": False, "error": str(exc)}
+                print(json.dumps(payload), flush=True)
+        return 0
+
+    with open_model(args.active_speaker) as model:
+        payload = analyze(args.frames, args.active_speaker, model)
     print(json.dumps(payload))
     return 0
 
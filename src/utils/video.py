@@ -1,10 +1,98 @@
 """Video processing utilities"""
 
+import functools
+import json
+import math
 import os
+import stat
 import subprocess
 import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+__all__ = [
+    "validate_video_file",
+    "extract_audio",
+    "extract_audio_array",
+    "get_video_duration",
+    "iter_audio_chunks",
+    "extract_audio_chunks",
+]
+
+# Chunk cuts run concurrently; each ffmpeg call reads a disjoint range of the
+# input, so a few in flight overlap process startup, seeking and decode
+CHUNK_EXTRACT_WORKERS = 4
+
+# Extraction calls capture stderr for error messages only; without these
+# ffmpeg also writes its banner and a progress line every half second
+FFMPEG_QUIET_ARGS = ["-hide_banner", "-nostats", "-loglevel", "error"]
+
+
+@dataclass(frozen=True)
+class _ProbeResult:
+    returncode: int
+    stderr: str
+    duration: Optional[str]
+
+
+def _run_probe(path: str) -> _ProbeResult:
+    # One ffprobe call answers both validate_video_file (is the header
+    # readable?) and get_video_duration
+    result = subprocess.run(
+        ["ffprobe", "-v", "error", "-select_streams", "v:0",
+         "-show_entries", "stream=codec_name:format=duration", "-of", "json", path],
+        capture_output=True,
+        timeout=30  # 30 second timeout for metadata read
+    )
+    duration = None
+    if result.returncode == 0:
+        try:
+            duration = json.loads(result.stdout).get("format", {}).get("duration")
+        except ValueError:
+            pass
+    return _ProbeResult(result.returncode, result.stderr.decode(errors="replace"), duration)
+
+
+class _ProbeFailed(Exception):
+    """Carries a nonzero-exit probe out of _cached_probe so lru_cache skips it."""
+
+    def __init__(self, result: _ProbeResult):
+        super().__init__(result.stderr)
+        self.result = result
+
+
+@functools.lru_cache(maxsize=16)
+def _cached_probe(path: str, mtime_ns: int, size: int) -> _ProbeResult:
+    result = _run_probe(path)
+    if result.returncode != 0:
+        # A file still being written (or a transient ffprobe failure) must be
+        # re-probed next time, not reported broken until its mtime changes
+        raise _ProbeFailed(result)
+    return result
+
+
+def _probe(video_path: str, st: Optional[os.stat_result] = None) -> _ProbeResult:
+    """
+    Probe a file once per (path, mtime, size); errors are not cached.
+    
+    `st` is a stat of the file the caller already has, to avoid another one.
+    """
+    path = str(video_path)
+    if st is None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return _run_probe(path)
+    try:
+        return _cached_probe(path, st.st_mtime_ns, st.st_size)
+    except _ProbeFailed as failed:
+        return failed.result
 
 
 def validate_video_file(video_path: str) -> bool:
@@ -19,29 +107,28 @@ def validate_video_file(video_path: str) -> bool:
     """
     path = Path(video_path)
     
-    if not path.exists():
+    # One stat answers both checks
+    try:
+        st = path.stat()
+    except OSError:
         raise FileNotFoundError(f"Video file not found: {video_path}")
     
-    if not path.is_file():
+    if not stat.S_ISREG(st.st_mode):
         raise ValueError(f"Path is not a file: {video_path}")
     
     # Check if ffmpeg/ffprobe can read the file header (fast check)
     try:
-        result = subprocess.run(
-            ["ffprobe", "-v", "error", "-select_streams", "v:0", 
-             "-show_entries", "stream=codec_name", "-of", "csv=p=0", str(path)],
-            capture_output=True,
-            timeout=30  # 30 second timeout for metadata read
-        )
+        result = _probe(str(path), st)
+        stderr = result.stderr
         if result.returncode != 0:
             # Try ffmpeg as fallback if ffprobe fails
-            result = subprocess.run(
+            fallback = subprocess.run(
                 ["ffmpeg", "-i", str(path), "-t", "1", "-f", "null", "-"],
                 capture_output=True,
                 timeout=30
             )
+            stderr = fallback.stderr.decode() if fallback.stderr else ""
         # Check for file not found errors
-        stderr = result.stderr.decode() if result.stderr else ""
         if "No such file" in stderr or "does not exist" in stderr.lower():
             raise ValueError(f"Cannot read video file: {video_path}")
     except subprocess.TimeoutExpired:
@@ -76,7 +163,9 @@ def extract_audio(video_path: str, output_path: Optional[str] = None) -> str:
         subprocess.run(
             [
                 "ffmpeg",
+                *FFMPEG_QUIET_ARGS,
                 "-i", str(video_path),
+                "-vn", "-sn", "-dn",  # Audio only: don't set up video/subtitle/data decoders
                 "-f", "wav",      # Force WAV format
                 "-acodec", "pcm_s16le", # PCM 16-bit little endian (fastest)
                 "-ar", "16000",  # Sample rate 16kHz (for Whisper)
@@ -99,88 +188,130 @@ def extract_audio(video_path: str, output_path: Optional[str] = None) -> str:
     return output_path
 
 
-def get_video_duration(video_path: str) -> float:
+def extract_audio_array(video_path: str) -> "np.ndarray":
     """
-    Get the duration of a video file in seconds using ffprobe.
+    Decode the audio track of a video straight into memory using FFmpeg.
+    
+    ffmpeg writes raw 16kHz mono PCM to a pipe instead of a temp WAV, so the
+    audio never round-trips through disk. Use extract_audio when a file path
+    is needed (e.g. for diarization).
     
     Args:
         video_path: Path to the video file
         
     Returns:
-        Duration in seconds
+        float32 waveform in [-1, 1], sampled at 16kHz (the format Whisper takes)
     """
+    import numpy as np
+    
+    validate_video_file(video_path)
+    
     try:
         result = subprocess.run(
             [
-                "ffprobe",
-                "-v", "error",
-                "-show_entries", "format=duration",
-                "-of", "csv=p=0",
-                str(video_path)
+                "ffmpeg",
+                *FFMPEG_QUIET_ARGS,
+                "-i", str(video_path),
+                "-vn", "-sn", "-dn",  # Audio only: don't set up video/subtitle/data decoders
+                "-f", "s16le",    # Raw PCM, no WAV header
+                "-acodec", "pcm_s16le",
+                "-ar", "16000",  # Sample rate 16kHz (for Whisper)
+                "-ac", "1",      # Mono channel
+                "-"               # Write to stdout
             ],
+            check=True,
             capture_output=True,
-            text=True,
-            timeout=30
+            timeout=300  # 5 minute timeout
         )
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to extract audio: {e.stderr.decode()}")
+    except subprocess.TimeoutExpired:
+        raise RuntimeError("Audio extraction timed out")
+    
+    if not result.stdout:
+        raise RuntimeError("Audio extraction failed: no audio samples produced")
+    
+    return np.frombuffer(result.stdout, dtype=np.int16).astype(np.float32) / 32768.0
+
+
+def get_video_duration(video_path: str) -> float:
+    """
+    Get the duration of a video file in seconds using ffprobe.
+    
+    Args:
+        video_path: Path to the video file
+        
+    Returns:
+        Duration in seconds
+    """
+    try:
+        result = _probe(video_path)
         if result.returncode != 0:
             raise RuntimeError(f"ffprobe failed: {result.stderr}")
-        return float(result.stdout.strip())
+        return float(result.duration)
     except subprocess.TimeoutExpired:
         raise RuntimeError("ffprobe timed out while getting video duration")
-    except ValueError:
+    except (TypeError, ValueError):
         raise RuntimeError(f"Could not parse duration from ffprobe output")
 
 
-def extract_audio_chunks(
+def iter_audio_chunks(
     video_path: str,
     chunk_duration: float = 600.0,
-    on_progress=None
-) -> List[Tuple[str, float]]:
+    on_progress=None,
+    total_duration: Optional[float] = None,
+    audio_path: Optional[str] = None
+) -> Iterator[Tuple[str, float]]:
     """
-    Extract audio from video in time-based chunks.
+    Extract audio from video in time-based chunks, yielding each as it is written.
+    
+    Consumers (e.g. Transcriber.transcribe_chunks) can start on chunk k while
+    ffmpeg is still producing chunk k+1.
     
     Args:
         video_path: Path to the video file
         chunk_duration: Duration of each chunk in seconds (default 600 = 10 min)
         on_progress: Optional callback(chunk_index, total_chunks) for progress
+        total_duration: Video duration in seconds, if already known (skips ffprobe)
+        audio_path: Already-extracted 16kHz mono WAV of the video (e.g. for
+            diarization); chunks are then stream-copied out of it instead of
+            decoding the video a second time
         
-    Returns:
-        List of (chunk_audio_path, offset_seconds) tuples
+    Yields:
+        (chunk_audio_path, offset_seconds) tuples in time order
     """
-    validate_video_file(video_path)
-    total_duration = get_video_duration(video_path)
+    if total_duration is None:
+        validate_video_file(video_path)
+        total_duration = get_video_duration(video_path)
     
     # Calculate number of chunks
-    import math
     num_chunks = math.ceil(total_duration / chunk_duration)
     
     if num_chunks <= 1:
         # Video fits in a single chunk, use regular extraction
-        audio_path = extract_audio(video_path)
-        return [(audio_path, 0.0)]
+        yield extract_audio(video_path), 0.0
+        return
     
     temp_dir = tempfile.gettempdir()
     video_name = Path(video_path).stem
-    chunks = []
+    if audio_path is not None:
+        # PCM cuts need no re-encode; seeking in WAV is sample-accurate
+        source = audio_path
+        codec_args = ["-f", "wav", "-c", "copy"]
+    else:
+        source = video_path
+        codec_args = ["-vn", "-sn", "-dn", "-f", "wav", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1"]
     
-    for i in range(num_chunks):
-        offset = i * chunk_duration
-        chunk_path = os.path.join(temp_dir, f"{video_name}_chunk_{i}.wav")
-        
-        if on_progress:
-            on_progress(i + 1, num_chunks)
-        
+    def extract_chunk(i: int, chunk_path: str) -> None:
         try:
             subprocess.run(
                 [
                     "ffmpeg",
-                    "-ss", str(offset),         # Seek to offset (before -i for fast seek)
-                    "-i", str(video_path),
+                    *FFMPEG_QUIET_ARGS,
+                    "-ss", str(i * chunk_duration),  # Seek to offset (before -i for fast seek)
+                    "-i", str(source),
                     "-t", str(chunk_duration),  # Duration of this chunk
-                    "-f", "wav",
-                    "-acodec", "pcm_s16le",
-                    "-ar", "16000",
-                    "-ac", "1",
+                    *codec_args,
                     "-y",
                     str(chunk_path)
                 ],
@@ -192,9 +323,55 @@ def extract_audio_chunks(
             raise RuntimeError(f"Failed to extract audio chunk {i + 1}: {e.stderr.decode()}")
         except subprocess.TimeoutExpired:
             raise RuntimeError(f"Audio chunk {i + 1} extraction timed out")
-        
+    
+    def finished(chunk_path: str, offset: float, future) -> Optional[Tuple[str, float]]:
+        future.result()
         if os.path.exists(chunk_path) and os.path.getsize(chunk_path) > 0:
-            chunks.append((chunk_path, offset))
+            return chunk_path, offset
+        return None
+    
+    # One ffmpeg call per chunk rather than a single -f segment pass: input-side
+    # seeking means each call only decodes its own range, and every chunk can be
+    # handed to the transcriber as soon as it is written. Up to
+    # CHUNK_EXTRACT_WORKERS cuts run ahead of the consumer; chunks are still
+    # yielded in time order and a failed cut raises when its turn comes.
+    workers = min(CHUNK_EXTRACT_WORKERS, num_chunks)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for i in range(num_chunks):
+            chunk_path = os.path.join(temp_dir, f"{video_name}_chunk_{i}.wav")
+            
+            if on_progress:
+                on_progress(i + 1, num_chunks)
+            
+            pending.append((chunk_path, i * chunk_duration, pool.submit(extract_chunk, i, chunk_path)))
+            if len(pending) == workers:
+                chunk = finished(*pending.popleft())
+                if chunk:
+                    yield chunk
+        while pending:
+            chunk = finished(*pending.popleft())
+            if chunk:
+                yield chunk
+
+
+def extract_audio_chunks(
+    video_path: str,
+    chunk_duration: float = 600.0,
+    on_progress=None
+) -> List[Tuple[str, float]]:
+    """
+    Extract audio from video in time-based chunks.
+    
+    Args:
+        video_path: Path to the video file
+        chunk_duration: Duration of each chunk in seconds (default 600 = 10 min)
+        on_progress: Optional callback(chunk_index, total_chunks) for progress
+        
+    Returns:
+        List of (chunk_audio_path, offset_seconds) tuples
+    """
+    chunks = list(iter_audio_chunks(video_path, chunk_duration, on_progress))
     
     if not chunks:
         raise RuntimeError("No audio chunks were produced")
@@ -0,0 +1,91 @@
+"""Tests for ShortsAgent response handling"""
+
+import json
+import unittest
+from unittest import mock
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from src.llm.agent import ShortsAgent
+from src.models.output import ShortsOutput
+
+
+def _chunk(start: float, end: float) -> dict:
+    return {
+        "text": "words",
+        "segments": [{"start": start, "end": end, "text": "words"}],
+    }
+
+
+def _short(title: str, start: float, end: float, reason="A reason that references the excerpt.") -> dict:
+    return {"title": title, "start_time": start, "end_time": end, "reason": reason}
+
+
+class PackedSelectionTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = ShortsAgent(FakeListChatModel(responses=["{}"]))
+        self.chunks = [_chunk(0.0, 100.0), _chunk(100.0, 200.0), _chunk(200.0, 300.0)]
+        # Finalizing is covered elsewhere; here only the routing matters
+        finalize = mock.patch.object(
+            ShortsAgent, "_finalize_selection", lambda self, output, *args: output
+        )
+        finalize.start()
+        self.addCleanup(finalize.stop)
+
+    def _run_packed(self, results):
+        content = json.dumps({"results": results})
+        fallback = ShortsOutput(shorts=[], total_shorts=0)
+        with mock.patch.object(self.agent, "_stream_json_response", return_value=content), \
+                mock.patch.object(self.agent, "select_shorts", return_value=fallback) as select_shorts:
+            outputs = self.agent._select_shorts_packed(self.chunks, None, 3, 0.0)
+        return outputs, select_shorts, fallback
+
+    def test_shorts_are_routed_by_time_when_chunk_index_is_wrong(self):
+        outputs, select_shorts, _ = self._run_packed([
+            {"chunk_index": 0, "shorts": [_short("First", 10.0, 40.0), _short("Third", 210.0, 240.0)]},
+            {"chunk_index": 1, "shorts": [_short("Second", 110.0, 140.0)]},
+        ])
+
+        select_shorts.assert_not_called()
+        self.assertEqual([[s.title for s in out.shorts] for out in outputs], [["First"], ["Second"], ["Third"]])
+
+    def test_invalid_chunk_falls_back_alone(self):
+        outputs, select_shorts, fallback = self._run_packed([
+            {"chunk_index": 0, "shorts": [_short("First", 10.0, 40.0)]},
+            {"chunk_index": 1, "shorts": [_short("Broken", 110.0, 140.0, reason=None)]},
+            {"chunk_index": 2, "shorts": [_short("Third", 210.0, 240.0)]},
+        ])
+
+        select_shorts.assert_called_once()
+        self.assertIs(select_shorts.call_args.args[0], self.chunks[1])
+        self.assertEqual([s.title for s in outputs[0].shorts], ["First"])
+        self.assertIs(outputs[1], fallback)
+        self.assertEqual([s.title for s in outputs[2].shorts], ["Third"])
+
+
+class BadRequestError(Exception):
+    """Stands in for openai/anthropic BadRequestError, matched by name."""
+
+
+class StructuredOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = ShortsAgent(FakeListChatModel(responses=["{}"]))
+        self.agent._structured_llm = mock.Mock()
+
+    def test_schema_rejection_disables_structured_output(self):
+        for error in (BadRequestError("schema not supported"), NotImplementedError(), ValueError("bad schema")):
+            self.agent._structured_llm = mock.Mock()
+            self.agent._structured_llm.invoke.side_effect = error
+            self.assertIsNone(self.agent._invoke_structured([]))
+            self.assertIsNone(self.agent._structured_llm)
+
+    def test_transient_error_is_raised_and_keeps_structured_output(self):
+        structured_llm = self.agent._structured_llm
+        structured_llm.invoke.side_effect = TimeoutError("read timed out")
+        with self.assertRaises(TimeoutError):
+            self.agent._invoke_structured([])
+        self.assertIs(self.agent._structured_llm, structured_llm)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+"""Tests for merging speaker turns into transcripts"""
+
+import unittest
+
+import numpy as np
+
+from src.asr.diarization import Diarizer
+
+
+def _turns(*turns):
+    return [{"start": start, "end": end, "speaker": speaker} for start, end, speaker in turns]
+
+
+class LookupSpeakersTest(unittest.TestCase):
+    def _lookup(self, turns, times):
+        starts, ends, labels = Diarizer._speaker_intervals({}, _turns(*turns))
+        return Diarizer._lookup_speakers(starts, ends, labels, np.array(times, dtype=np.float64))
+
+    def test_long_turn_covers_times_after_a_nested_turn(self):
+        turns = [(0.0, 10.0, "A"), (2.0, 3.0, "B")]
+        self.assertEqual(self._lookup(turns, [1.0, 2.5, 5.0, 9.0, 11.0]), ["A", "B", "A", "A", None])
+
+    def test_latest_starting_covering_turn_wins(self):
+        turns = [(0.0, 10.0, "A"), (4.0, 12.0, "B"), (5.0, 6.0, "C")]
+        self.assertEqual(self._lookup(turns, [3.0, 4.5, 5.5, 7.0, 11.0]), ["A", "B", "C", "B", "B"])
+
+    def test_gaps_and_times_before_the_first_turn_are_unassigned(self):
+        turns = [(1.0, 2.0, "A"), (3.0, 4.0, "B")]
+        self.assertEqual(self._lookup(turns, [0.5, 1.5, 2.5, 3.5]), [None, "A", None, "B"])
+
+
+class MergeWithTranscriptionTest(unittest.TestCase):
+    def test_words_inside_an_overlapped_turn_vote(self):
+        transcript = {
+            "segments": [{
+                "start": 4.0,
+                "end": 9.5,
+                "speaker": "SPEAKER_X",
+                "words": [
+                    {"word": "a", "start": 4.0, "end": 5.0},
+                    {"word": "b", "start": 6.0, "end": 7.0},
+                    {"word": "c", "start": 8.5, "end": 9.5},
+                ],
+            }],
+        }
+        merged = Diarizer().merge_with_transcription(
+            transcript,
+            {"segments": []},
+            diarize_segments=_turns((0.0, 10.0, "A"), (2.0, 3.0, "B")),
+        )
+
+        segment = merged["segments"][0]
+        self.assertEqual([w["speaker"] for w in segment["words"]], ["A", "A", "A"])
+        self.assertEqual(segment["speaker"], "A")
+        self.assertEqual(merged["speakers"], ["A"])
+        # The input is labelled on a copy
+        self.assertNotIn("speaker", transcript["segments"][0]["words"][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
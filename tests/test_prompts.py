@@ -0,0 +1,22 @@
+"""Tests for the LLM prompt templates"""
+
+import unittest
+
+from src.llm.prompts import get_titles_reasons_prompt
+
+
+class TitlesReasonsPromptTest(unittest.TestCase):
+    def test_example_json_is_literal(self):
+        # The example output's braces must be escaped, or ChatPromptTemplate
+        # treats them as template variables and the prompt can't be formatted
+        prompt = get_titles_reasons_prompt()
+        self.assertEqual(prompt.input_variables, ["items"])
+
+        messages = prompt.format_messages(items="[0] 10.0s - 40.0s: excerpt")
+        self.assertIn('"items": [', messages[0].content)
+        self.assertIn('{ "index": 0, "title": "Specific headline"', messages[0].content)
+        self.assertIn("[0] 10.0s - 40.0s: excerpt", messages[1].content)
+
+
+if __name__ == "__main__":
+    unittest.main()